@@ -1,19 +1,9 @@
 """Main application entry point with authentication."""
 import sys
 import logging
-from pathlib import Path
+from functools import cached_property
 from PyQt6.QtWidgets import QApplication, QMessageBox
-from PyQt6.QtCore import Qt
-
-from src.core.config import AppConfig
-from src.core.encryption import EncryptionService
-from src.core.database import Database
-from src.core.auth_manager import AuthenticationManager
-from src.controllers.note_controller import NoteController
-from src.controllers.notebook_controller import NotebookController
-from src.ui.first_run_wizard import FirstRunWizard
-from src.ui.auth_dialog import AuthenticationDialog
-from src.ui.main_window import MainWindow
+from PyQt6.QtCore import Qt, QTimer
 
 logger = logging.getLogger(__name__)
 
@@ -32,23 +22,48 @@ class TMApp:
             Qt.HighDpiScaleFactorRoundingPolicy.PassThrough
         )
         
-        # Initialize core services
-        self.config = AppConfig()
-        self.encryption_service = EncryptionService()
-        self.database = Database(self.config.db_file)
-        
-        # Initialize authentication manager
-        self.auth_manager = AuthenticationManager(self.config.app_dir)
-        
-        # Initialize controllers
-        self.note_controller = NoteController(self.database, self.encryption_service)
-        self.notebook_controller = NotebookController(self.database)
-        
+        # Core services and controllers are created lazily on first use
         self.main_window = None
         self.is_authenticated = False
         
         logger.info("TMapp initialized")
     
+    @cached_property
+    def config(self):
+        """Application configuration."""
+        from src.core.config import AppConfig
+        return AppConfig()
+    
+    @cached_property
+    def encryption_service(self):
+        """Encryption service holding the session key."""
+        from src.core.encryption import EncryptionService
+        return EncryptionService()
+    
+    @cached_property
+    def database(self):
+        """Notes database."""
+        from src.core.database import Database
+        return Database(self.config.db_file)
+    
+    @cached_property
+    def auth_manager(self):
+        """Master password authentication manager."""
+        from src.core.auth_manager import AuthenticationManager
+        return AuthenticationManager(self.config.app_dir)
+    
+    @cached_property
+    def note_controller(self):
+        """Note controller."""
+        from src.controllers.note_controller import NoteController
+        return NoteController(self.database, self.encryption_service)
+    
+    @cached_property
+    def notebook_controller(self):
+        """Notebook controller."""
+        from src.controllers.notebook_controller import NotebookController
+        return NotebookController(self.database)
+    
     def run(self):
         """Run the application with authentication flow."""
         try:
@@ -84,6 +99,8 @@ class TMApp:
     
     def _show_first_run_wizard(self) -> bool:
         """Show the first-run setup wizard."""
+        from src.ui.first_run_wizard import FirstRunWizard
+        
         wizard = FirstRunWizard()
         
         if wizard.exec() == wizard.DialogCode.Accepted:
@@ -115,14 +132,17 @@ class TMApp:
     
     def _show_authentication_dialog(self) -> bool:
         """Show authentication dialog and wait for success."""
+        from src.ui.auth_dialog import AuthenticationDialog
+        
         auth_dialog = AuthenticationDialog(self.auth_manager)
         
         def on_auth_success(encryption_key: bytes):
             """Handle successful authentication."""
             self.is_authenticated = True
             # Cache the encryption key in encryption service
-            self.encryption_service._cached_key = encryption_key
-            self.encryption_service._cached_salt = self.auth_manager.get_stored_salt()
+            self.encryption_service.set_cached_key(
+                encryption_key, self.auth_manager.get_stored_salt()
+            )
             logger.info("Encryption key cached for session")
         
         auth_dialog.authentication_successful.connect(on_auth_success)
@@ -136,6 +156,10 @@ class TMApp:
     
     def _show_main_window(self):
         """Show main application window after authentication."""
+        from src.ui.main_window import MainWindow
+        
+        # Controllers (and the database) exist before the window, so every
+        # action works from the first paint; only the lists load afterwards
         self.main_window = MainWindow(
             self.config,
             self.encryption_service,
@@ -144,6 +168,9 @@ class TMApp:
         )
         self.main_window.show()
         logger.info("Main window displayed")
+        
+        # Load notes once the window has painted
+        QTimer.singleShot(0, self.main_window.populate_async)
 
 
 def main():
@@ -1,13 +1,93 @@
 import logging
-from typing import List, Optional
+import re
 from datetime import datetime
+from itertools import islice
+from typing import Iterator, List, Optional
 
-from src.models.note import Note
-from src.core.database import Database
+from src.models.note import Note, NOTE_COLUMNS, PREVIEW_COLUMNS
+from src.core.database import Database, in_clause_params
 from src.core.encryption import EncryptionService
 
 logger = logging.getLogger(__name__)
 
+# Column order of Note.as_db_row, shared by the write statements below
+_NOTE_COLUMNS = (
+    'id', 'title', 'content', 'notebook_id', 'tags', 'created_at', 'modified_at',
+    'is_favorite', 'is_pinned', 'is_archived', 'is_trashed', 'color',
+    'attachments', 'images', 'links', 'has_tasks', 'completed_tasks', 'total_tasks',
+    'word_count', 'character_count', 'reading_time', 'encrypted', 'encryption_version',
+    'created_at_ms', 'modified_at_ms'
+)
+
+_INSERT_NOTE_SQL = (
+    f"INSERT INTO notes ({', '.join(_NOTE_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(_NOTE_COLUMNS))})"
+)
+
+# Takes Note.as_db_row(...) rotated so the id comes last (see _update_params)
+_UPDATE_NOTE_SQL = (
+    f"UPDATE notes SET {', '.join(f'{col} = ?' for col in _NOTE_COLUMNS[1:])} "
+    f"WHERE id = ?"
+)
+
+
+# Stamp modified_at (local ISO text) and modified_at_ms (unix ms) in SQL
+_TOUCH_SQL = (
+    "modified_at = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'), "
+    "modified_at_ms = CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)"
+)
+
+_SELECT_NOTE_SQL = (
+    f"SELECT {', '.join(NOTE_COLUMNS)} FROM notes WHERE id = ? AND is_trashed = 0"
+)
+
+_DELETE_NOTE_SQL = "DELETE FROM notes WHERE id = ?"
+
+_TRASH_NOTE_SQL = f"UPDATE notes SET is_trashed = 1, {_TOUCH_SQL} WHERE id = ?"
+
+_RESTORE_NOTE_SQL = f"UPDATE notes SET is_trashed = 0, {_TOUCH_SQL} WHERE id = ?"
+
+# Flag toggles, formatted once so every call passes the identical statement
+_TOGGLE_SQL = {
+    column: (f"UPDATE notes SET {column} = 1 - {column}, {_TOUCH_SQL} "
+             f"WHERE id = ? AND is_trashed = 0")
+    for column in ('is_favorite', 'is_pinned', 'is_archived')
+}
+
+# Default title, stored unencrypted as an empty blob (title is NOT NULL)
+_UNTITLED = "Untitled Note"
+_UNTITLED_BLOB = b''
+
+# List views never show content, so they skip the (largest) content column
+_PREVIEW_SELECT = f"SELECT {', '.join(PREVIEW_COLUMNS)} FROM notes"
+
+# Full-text index over decrypted titles and content. Notes are encrypted at
+# rest, so it lives in the connection's TEMP schema (held in memory by
+# temp_store), is built on the first search and dropped when the app locks.
+# TEMP tables are per connection, so its queries pass writer=True.
+# Trigram tokens let a quoted phrase match any substring of 3+ characters.
+_SEARCH_DDL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS temp.notes_search
+    USING fts5(note_id UNINDEXED, title, content, tokenize = 'trigram')
+"""
+
+_SEARCH_INSERT_SQL = "INSERT INTO temp.notes_search (note_id, title, content) VALUES (?, ?, ?)"
+
+# Rows are PREVIEW_COLUMNS followed by the plaintext title and content
+_SEARCH_SELECT = f"""
+    SELECT {', '.join(f'notes.{col}' for col in PREVIEW_COLUMNS)},
+           notes_search.title, notes_search.content
+    FROM temp.notes_search JOIN notes ON notes.id = notes_search.note_id
+    WHERE notes.is_trashed = 0
+"""
+
+_SEARCH_ORDER = " ORDER BY notes.is_pinned DESC, notes.modified_at_ms DESC"
+
+
+def _update_params(row: tuple) -> tuple:
+    """Reorder a Note.as_db_row tuple for _UPDATE_NOTE_SQL."""
+    return row[1:] + row[:1]
+
 
 class NoteController:
     """Controller for all note operations with encryption."""
@@ -23,6 +103,8 @@ class NoteController:
         """
         Create a new note with encryption.
         
+        Commits one row per call; imports should use create_notes_bulk.
+        
         Args:
             title: Note title
             notebook_id: Parent notebook ID
@@ -35,30 +117,16 @@ class NoteController:
             # Create note object
             note = Note.create_new(title=title, notebook_id=notebook_id)
             note.content = content if content else " "  # Use space for empty content
-            note.update_metadata(content)
+            note.update_metadata(content, note.created_at)
             
             # Encrypt sensitive fields (handle empty strings)
-            encrypted_title = self.encryption.encrypt(note.title if note.title else "Untitled Note")
+            encrypted_title = self._encrypt_titles([note.title])[0]
             encrypted_content = self.encryption.encrypt(note.content)
             
             # Insert into database
-            self.db.execute("""
-                INSERT INTO notes (
-                    id, title, content, notebook_id, tags, created_at, modified_at,
-                    is_favorite, is_pinned, is_archived, is_trashed, color,
-                    attachments, images, links, has_tasks, completed_tasks, total_tasks,
-                    word_count, character_count, reading_time, encrypted, encryption_version
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                note.id, encrypted_title, encrypted_content, note.notebook_id,
-                ','.join(note.tags), note.created_at.isoformat(), note.modified_at.isoformat(),
-                int(note.is_favorite), int(note.is_pinned), int(note.is_archived), 
-                int(note.is_trashed), note.color,
-                ','.join(note.attachments), ','.join(note.images), ','.join(note.links),
-                int(note.has_tasks), note.completed_tasks, note.total_tasks,
-                note.word_count, note.character_count, note.reading_time,
-                int(note.encrypted), note.encryption_version
-            ))
+            self.db.execute(_INSERT_NOTE_SQL,
+                            note.as_db_row(encrypted_title, encrypted_content))
+            self._index_notes([note])
             
             logger.info(f"Created note: {note.id}")
             return note
@@ -67,6 +135,41 @@ class NoteController:
             logger.error(f"Failed to create note: {e}", exc_info=True)
             raise
     
+    def create_notes_bulk(self, notes: List[Note]) -> bool:
+        """
+        Insert many new notes in a single transaction.
+        
+        Args:
+            notes: Note objects to insert (e.g. from an import)
+            
+        Returns:
+            Success status
+        """
+        try:
+            # One clock read for the whole batch
+            now = datetime.now()
+            for note in notes:
+                note.update_metadata(note.content, now)
+            
+            # Encrypt sensitive fields (handle empty strings)
+            encrypted_titles = self._encrypt_titles([note.title for note in notes])
+            encrypted_contents = self.encryption.encrypt_many(
+                [note.content if note.content.strip() else " " for note in notes])
+            
+            rows = [note.as_db_row(title, content) for note, title, content
+                    in zip(notes, encrypted_titles, encrypted_contents)]
+            
+            if not self.db.execute_many(_INSERT_NOTE_SQL, rows):
+                return False
+            self._index_notes(notes)
+            
+            logger.info(f"Created {len(rows)} notes")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Failed to create notes: {e}", exc_info=True)
+            return False
+    
     def get_note(self, note_id: str) -> Optional[Note]:
         """
         Retrieve and decrypt a note by ID.
@@ -78,21 +181,15 @@ class NoteController:
             Decrypted Note object or None
         """
         try:
-            result = self.db.query_one("""
-                SELECT * FROM notes WHERE id = ? AND is_trashed = 0
-            """, (note_id,))
+            result = self.db.query_one(_SELECT_NOTE_SQL, (note_id,))
             
             if not result:
                 return None
             
-            # Convert to dict and decrypt
-            note_dict = dict(result)
-            note_dict['title'] = self.encryption.decrypt(note_dict['title'])
-            decrypted_content = self.encryption.decrypt(note_dict['content'])
+            title = self._decrypt_titles([result[1]])[0]
+            content = self.encryption.decrypt(result[len(PREVIEW_COLUMNS)])
             # Remove placeholder space if it was added for empty content
-            note_dict['content'] = decrypted_content.strip() if decrypted_content == " " else decrypted_content
-            
-            return Note.from_dict(note_dict)
+            return Note.from_row(result, title, "" if content == " " else content)
         
         except Exception as e:
             logger.error(f"Failed to get note {note_id}: {e}")
@@ -102,6 +199,8 @@ class NoteController:
         """
         Update an existing note with encryption.
         
+        Commits one row per call; saving many notes should use update_notes.
+        
         Args:
             note: Note object with updated data
             
@@ -112,29 +211,15 @@ class NoteController:
             note.update_metadata(note.content)
             
             # Encrypt sensitive fields (handle empty strings)
-            encrypted_title = self.encryption.encrypt(note.title if note.title else "Untitled Note")
+            encrypted_title = self._encrypt_titles([note.title])[0]
             # Use space for empty content to avoid encryption error
             content_to_encrypt = note.content if note.content.strip() else " "
             encrypted_content = self.encryption.encrypt(content_to_encrypt)
             
             # Update database
-            self.db.execute("""
-                UPDATE notes SET
-                    title = ?, content = ?, notebook_id = ?, tags = ?, modified_at = ?,
-                    is_favorite = ?, is_pinned = ?, is_archived = ?, is_trashed = ?, color = ?,
-                    attachments = ?, images = ?, links = ?,
-                    has_tasks = ?, completed_tasks = ?, total_tasks = ?,
-                    word_count = ?, character_count = ?, reading_time = ?
-                WHERE id = ?
-            """, (
-                encrypted_title, encrypted_content, note.notebook_id, ','.join(note.tags),
-                note.modified_at.isoformat(), int(note.is_favorite), int(note.is_pinned),
-                int(note.is_archived), int(note.is_trashed), note.color,
-                ','.join(note.attachments), ','.join(note.images), ','.join(note.links),
-                int(note.has_tasks), note.completed_tasks, note.total_tasks,
-                note.word_count, note.character_count, note.reading_time,
-                note.id
-            ))
+            self.db.execute(_UPDATE_NOTE_SQL, _update_params(
+                note.as_db_row(encrypted_title, encrypted_content)))
+            self._index_notes([note])
             
             logger.info(f"Updated note: {note.id}")
             return True
@@ -143,6 +228,41 @@ class NoteController:
             logger.error(f"Failed to update note {note.id}: {e}")
             return False
     
+    def update_notes(self, notes: List[Note]) -> bool:
+        """
+        Save several edited notes in a single transaction.
+        
+        Args:
+            notes: Note objects with updated data
+            
+        Returns:
+            Success status
+        """
+        try:
+            # One clock read for the whole batch
+            now = datetime.now()
+            for note in notes:
+                note.update_metadata(note.content, now)
+            
+            # Encrypt sensitive fields (handle empty strings)
+            encrypted_titles = self._encrypt_titles([note.title for note in notes])
+            encrypted_contents = self.encryption.encrypt_many(
+                [note.content if note.content.strip() else " " for note in notes])
+            
+            rows = [_update_params(note.as_db_row(title, content)) for note, title, content
+                    in zip(notes, encrypted_titles, encrypted_contents)]
+            
+            if not self.db.execute_many(_UPDATE_NOTE_SQL, rows):
+                return False
+            self._index_notes(notes)
+            
+            logger.info(f"Updated {len(rows)} notes")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Failed to update notes: {e}", exc_info=True)
+            return False
+    
     def delete_note(self, note_id: str, permanent: bool = False) -> bool:
         """
         Delete a note (soft or permanent).
@@ -157,13 +277,11 @@ class NoteController:
         try:
             if permanent:
                 # Permanent delete
-                self.db.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+                self.db.execute(_DELETE_NOTE_SQL, (note_id,))
                 logger.info(f"Permanently deleted note: {note_id}")
             else:
                 # Soft delete (move to trash)
-                self.db.execute("""
-                    UPDATE notes SET is_trashed = 1, modified_at = ? WHERE id = ?
-                """, (datetime.now().isoformat(), note_id))
+                self.db.execute(_TRASH_NOTE_SQL, (note_id,))
                 logger.info(f"Moved note to trash: {note_id}")
             
             return True
@@ -172,6 +290,33 @@ class NoteController:
             logger.error(f"Failed to delete note {note_id}: {e}")
             return False
     
+    def delete_notes(self, note_ids: List[str]) -> bool:
+        """
+        Move several notes to trash with a single statement.
+        
+        Args:
+            note_ids: IDs of the notes to trash
+            
+        Returns:
+            Success status
+        """
+        if not note_ids:
+            return True
+        
+        try:
+            placeholders, params = in_clause_params(note_ids)
+            self.db.execute(f"""
+                UPDATE notes SET is_trashed = 1, {_TOUCH_SQL}
+                WHERE id IN {placeholders}
+            """, params)
+            
+            logger.info(f"Moved {len(note_ids)} notes to trash")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Failed to delete notes: {e}")
+            return False
+    
     def restore_note(self, note_id: str) -> bool:
         """
         Restore a note from trash.
@@ -183,9 +328,7 @@ class NoteController:
             Success status
         """
         try:
-            self.db.execute("""
-                UPDATE notes SET is_trashed = 0, modified_at = ? WHERE id = ?
-            """, (datetime.now().isoformat(), note_id))
+            self.db.execute(_RESTORE_NOTE_SQL, (note_id,))
             
             logger.info(f"Restored note from trash: {note_id}")
             return True
@@ -194,6 +337,92 @@ class NoteController:
             logger.error(f"Failed to restore note {note_id}: {e}")
             return False
     
+    def restore_notes(self, note_ids: List[str]) -> bool:
+        """
+        Restore several notes from trash with a single statement.
+        
+        Args:
+            note_ids: IDs of the notes to restore
+            
+        Returns:
+            Success status
+        """
+        if not note_ids:
+            return True
+        
+        try:
+            placeholders, params = in_clause_params(note_ids)
+            self.db.execute(f"""
+                UPDATE notes SET is_trashed = 0, {_TOUCH_SQL}
+                WHERE id IN {placeholders}
+            """, params)
+            
+            logger.info(f"Restored {len(note_ids)} notes from trash")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Failed to restore notes: {e}")
+            return False
+    
+    def _encrypt_titles(self, titles: List[str]) -> List[bytes]:
+        """Encrypt titles in one batch, leaving the default title unencrypted."""
+        encrypted = iter(self.encryption.encrypt_many(
+            [title for title in titles if title and title != _UNTITLED]))
+        return [next(encrypted) if title and title != _UNTITLED else _UNTITLED_BLOB
+                for title in titles]
+    
+    def _decrypt_titles(self, blobs: List[bytes]) -> List[str]:
+        """Decrypt titles in one batch, restoring the default title for empty blobs."""
+        decrypted = iter(self.encryption.decrypt_many([blob for blob in blobs if blob]))
+        return [next(decrypted) if blob else _UNTITLED for blob in blobs]
+    
+    def _build_list_notes(self, results) -> List[Note]:
+        """Build list-view notes from _PREVIEW_SELECT rows, decrypting titles in one batch."""
+        # Decrypt only titles for list view (performance)
+        titles = self._decrypt_titles([row[1] for row in results])
+        return [Note.from_row_preview(row, title) for row, title in zip(results, titles)]
+    
+    def iter_all_notes(self, include_trashed: bool = False,
+                       include_archived: bool = True,
+                       page_size: int = 500) -> Iterator[Note]:
+        """
+        Yield notes page by page with optional filters.
+        
+        Args:
+            include_trashed: Include trashed notes
+            include_archived: Include archived notes
+            page_size: Rows fetched and decrypted per batch
+            
+        Yields:
+            Note objects (titles decrypted, content not)
+        """
+        query = f"{_PREVIEW_SELECT} WHERE 1=1"
+        
+        if not include_trashed:
+            query += " AND is_trashed = 0"
+        
+        if not include_archived:
+            query += " AND is_archived = 0"
+        
+        query += " ORDER BY is_pinned DESC, modified_at_ms DESC"
+        
+        return self._iter_list_notes(query, (), page_size)
+    
+    def _iter_list_notes(self, query: str, params: tuple,
+                         page_size: int) -> Iterator[Note]:
+        """Stream list-view notes for a _PREVIEW_SELECT query in batches."""
+        # One statement streamed in batches; OFFSET paging re-walked the
+        # index for every page
+        rows = self.db.iter_query(query, params, arraysize=page_size)
+        try:
+            while True:
+                results = list(islice(rows, page_size))
+                if not results:
+                    return
+                yield from self._build_list_notes(results)
+        finally:
+            rows.close()
+    
     def get_all_notes(self, include_trashed: bool = False, 
                      include_archived: bool = True) -> List[Note]:
         """
@@ -207,26 +436,7 @@ class NoteController:
             List of Note objects (titles decrypted, content not)
         """
         try:
-            query = "SELECT * FROM notes WHERE 1=1"
-            
-            if not include_trashed:
-                query += " AND is_trashed = 0"
-            
-            if not include_archived:
-                query += " AND is_archived = 0"
-            
-            query += " ORDER BY is_pinned DESC, modified_at DESC"
-            
-            results = self.db.query_all(query)
-            notes = []
-            
-            for row in results:
-                note_dict = dict(row)
-                # Decrypt only title for list view (performance)
-                note_dict['title'] = self.encryption.decrypt(note_dict['title'])
-                # Don't decrypt content for preview
-                note_dict['content'] = ""
-                notes.append(Note.from_dict(note_dict))
+            notes = list(self.iter_all_notes(include_trashed, include_archived))
             
             logger.info(f"Retrieved {len(notes)} notes")
             return notes
@@ -235,23 +445,54 @@ class NoteController:
             logger.error(f"Failed to get all notes: {e}")
             return []
     
+    def get_recent_notes(self, limit: int = 20) -> List[Note]:
+        """
+        Get the most recently modified notes, pinned notes first.
+        
+        Only the returned rows are read and have their titles decrypted.
+        
+        Args:
+            limit: Maximum number of notes
+            
+        Returns:
+            List of Note objects (titles decrypted, content not)
+        """
+        try:
+            results = self.db.query_all(f"""
+                {_PREVIEW_SELECT}
+                WHERE is_trashed = 0
+                ORDER BY is_pinned DESC, modified_at_ms DESC
+                LIMIT ?
+            """, (limit,))
+            
+            return self._build_list_notes(results)
+        
+        except Exception as e:
+            logger.error(f"Failed to get recent notes: {e}")
+            return []
+    
+    def iter_notes_by_notebook(self, notebook_id: str,
+                               page_size: int = 500) -> Iterator[Note]:
+        """
+        Yield the notes of a notebook page by page.
+        
+        Args:
+            notebook_id: Notebook ID
+            page_size: Rows fetched and decrypted per batch
+            
+        Yields:
+            Note objects (titles decrypted, content not)
+        """
+        return self._iter_list_notes(f"""
+            {_PREVIEW_SELECT}
+            WHERE notebook_id = ? AND is_trashed = 0
+            ORDER BY is_pinned DESC, modified_at_ms DESC
+        """, (notebook_id,), page_size)
+    
     def get_notes_by_notebook(self, notebook_id: str) -> List[Note]:
         """Get all notes in a specific notebook."""
         try:
-            results = self.db.query_all("""
-                SELECT * FROM notes 
-                WHERE notebook_id = ? AND is_trashed = 0
-                ORDER BY is_pinned DESC, modified_at DESC
-            """, (notebook_id,))
-            
-            notes = []
-            for row in results:
-                note_dict = dict(row)
-                note_dict['title'] = self.encryption.decrypt(note_dict['title'])
-                note_dict['content'] = ""
-                notes.append(Note.from_dict(note_dict))
-            
-            return notes
+            return list(self.iter_notes_by_notebook(notebook_id))
         
         except Exception as e:
             logger.error(f"Failed to get notes for notebook {notebook_id}: {e}")
@@ -260,20 +501,13 @@ class NoteController:
     def get_favorite_notes(self) -> List[Note]:
         """Get all favorited notes."""
         try:
-            results = self.db.query_all("""
-                SELECT * FROM notes 
+            results = self.db.query_all(f"""
+                {_PREVIEW_SELECT}
                 WHERE is_favorite = 1 AND is_trashed = 0
-                ORDER BY modified_at DESC
+                ORDER BY modified_at_ms DESC
             """)
             
-            notes = []
-            for row in results:
-                note_dict = dict(row)
-                note_dict['title'] = self.encryption.decrypt(note_dict['title'])
-                note_dict['content'] = ""
-                notes.append(Note.from_dict(note_dict))
-            
-            return notes
+            return self._build_list_notes(results)
         
         except Exception as e:
             logger.error(f"Failed to get favorite notes: {e}")
@@ -282,20 +516,13 @@ class NoteController:
     def get_trashed_notes(self) -> List[Note]:
         """Get all trashed notes."""
         try:
-            results = self.db.query_all("""
-                SELECT * FROM notes 
+            results = self.db.query_all(f"""
+                {_PREVIEW_SELECT}
                 WHERE is_trashed = 1
-                ORDER BY modified_at DESC
+                ORDER BY modified_at_ms DESC
             """)
             
-            notes = []
-            for row in results:
-                note_dict = dict(row)
-                note_dict['title'] = self.encryption.decrypt(note_dict['title'])
-                note_dict['content'] = ""
-                notes.append(Note.from_dict(note_dict))
-            
-            return notes
+            return self._build_list_notes(results)
         
         except Exception as e:
             logger.error(f"Failed to get trashed notes: {e}")
@@ -304,11 +531,8 @@ class NoteController:
     def toggle_favorite(self, note_id: str) -> bool:
         """Toggle favorite status of a note."""
         try:
-            note = self.get_note(note_id)
-            if note:
-                note.is_favorite = not note.is_favorite
-                return self.update_note(note)
-            return False
+            cursor = self.db.execute(_TOGGLE_SQL['is_favorite'], (note_id,))
+            return cursor.rowcount > 0
         
         except Exception as e:
             logger.error(f"Failed to toggle favorite for {note_id}: {e}")
@@ -317,11 +541,8 @@ class NoteController:
     def toggle_pin(self, note_id: str) -> bool:
         """Toggle pin status of a note."""
         try:
-            note = self.get_note(note_id)
-            if note:
-                note.is_pinned = not note.is_pinned
-                return self.update_note(note)
-            return False
+            cursor = self.db.execute(_TOGGLE_SQL['is_pinned'], (note_id,))
+            return cursor.rowcount > 0
         
         except Exception as e:
             logger.error(f"Failed to toggle pin for {note_id}: {e}")
@@ -330,11 +551,8 @@ class NoteController:
     def toggle_archive(self, note_id: str) -> bool:
         """Toggle archive status of a note."""
         try:
-            note = self.get_note(note_id)
-            if note:
-                note.is_archived = not note.is_archived
-                return self.update_note(note)
-            return False
+            cursor = self.db.execute(_TOGGLE_SQL['is_archived'], (note_id,))
+            return cursor.rowcount > 0
         
         except Exception as e:
             logger.error(f"Failed to toggle archive for {note_id}: {e}")
@@ -351,19 +569,31 @@ class NoteController:
             List of matching notes
         """
         try:
-            all_notes = self.get_all_notes()
-            matching_notes = []
-            
-            query_lower = query.lower()
+            self._build_search_index()
+            
+            if len(query) >= 3 and query.isascii():
+                # Match with the trigram index; the phrase is quoted so the
+                # query text is never read as FTS syntax
+                phrase = '"' + query.replace('"', '""') + '"'
+                results = self.db.query_all(
+                    f"{_SEARCH_SELECT} AND notes_search MATCH ?{_SEARCH_ORDER}", (phrase,),
+                    writer=True)
+            elif query.isascii():
+                # Too short for trigrams: LIKE folds ASCII case the same way,
+                # so SQLite filters the in-memory index without Python
+                pattern = '%' + re.sub(r'([%_\\])', r'\\\1', query) + '%'
+                results = self.db.query_all(
+                    f"{_SEARCH_SELECT} AND (notes_search.title LIKE ?1 ESCAPE '\\' "
+                    f"OR notes_search.content LIKE ?1 ESCAPE '\\'){_SEARCH_ORDER}",
+                    (pattern,), writer=True)
+            else:
+                # SQLite only folds ASCII case: scan the index and match in Python
+                pattern = re.compile(re.escape(query), re.IGNORECASE)
+                results = [row for row in self.db.query_all(_SEARCH_SELECT + _SEARCH_ORDER,
+                                                            writer=True)
+                           if pattern.search(row[-2]) or pattern.search(row[-1])]
             
-            for note in all_notes:
-                # Get full note with content
-                full_note = self.get_note(note.id)
-                if full_note:
-                    # Search in title and content
-                    if (query_lower in full_note.title.lower() or 
-                        query_lower in full_note.content.lower()):
-                        matching_notes.append(full_note)
+            matching_notes = [Note.from_row(row, row[-2], row[-1]) for row in results]
             
             logger.info(f"Search '{query}' found {len(matching_notes)} results")
             return matching_notes
@@ -372,22 +602,90 @@ class NoteController:
             logger.error(f"Search failed: {e}")
             return []
     
+    def clear_search_index(self):
+        """Drop the in-memory search index and the plaintext it holds."""
+        try:
+            self.db.execute("DROP TABLE IF EXISTS temp.notes_search")
+        except Exception as e:
+            logger.error(f"Failed to clear search index: {e}")
+    
+    def _search_index_ready(self) -> bool:
+        """Check whether the search index exists on the current connection."""
+        return self.db.query_scalar("""
+            SELECT 1 FROM sqlite_temp_master WHERE name = 'notes_search'
+        """, writer=True) is not None
+    
+    def _build_search_index(self):
+        """Decrypt every note once and load it into the search index."""
+        if self._search_index_ready():
+            return
+        
+        results = self.db.query_all("SELECT id, title, content FROM notes")
+        titles = self._decrypt_titles([row['title'] for row in results])
+        contents = self.encryption.decrypt_many([row['content'] for row in results])
+        
+        # Remove placeholder space if it was added for empty content
+        rows = [(row['id'], title, "" if content == " " else content)
+                for row, title, content in zip(results, titles, contents)]
+        
+        with self.db.transaction():
+            self.db.execute(_SEARCH_DDL)
+            if not self.db.execute_many(_SEARCH_INSERT_SQL, rows):
+                raise RuntimeError("Failed to fill search index")
+        
+        logger.info(f"Built search index ({len(rows)} notes)")
+    
+    def _index_notes(self, notes: List[Note]):
+        """Refresh saved notes in the search index, if it has been built."""
+        try:
+            if not self._search_index_ready():
+                return
+            
+            rows = [(note.id, note.title, "" if note.content == " " else note.content)
+                    for note in notes]
+            
+            with self.db.transaction():
+                if not (self.db.execute_many("DELETE FROM temp.notes_search WHERE note_id = ?",
+                                             [(note.id,) for note in notes])
+                        and self.db.execute_many(_SEARCH_INSERT_SQL, rows)):
+                    raise RuntimeError("Batch execution failed")
+        
+        except Exception as e:
+            # A stale index would hide matches, so drop it and rebuild on the next search
+            logger.error(f"Failed to update search index: {e}")
+            self.clear_search_index()
+    
     def get_note_count(self) -> int:
         """Get total note count (excluding trash)."""
         try:
-            result = self.db.query_one("""
-                SELECT COUNT(*) as count FROM notes WHERE is_trashed = 0
-            """)
-            return result['count'] if result else 0
+            return self.db.query_scalar("""
+                SELECT COUNT(*) FROM notes WHERE is_trashed = 0
+            """, default=0)
         
         except Exception as e:
             logger.error(f"Failed to get note count: {e}")
             return 0
     
-    def empty_trash(self) -> bool:
-        """Permanently delete all trashed notes."""
+    def empty_trash(self, note_ids: Optional[List[str]] = None) -> bool:
+        """
+        Permanently delete trashed notes.
+        
+        Args:
+            note_ids: Only delete these trashed notes; all of them if None
+            
+        Returns:
+            Success status
+        """
         try:
-            self.db.execute("DELETE FROM notes WHERE is_trashed = 1")
+            if note_ids is None:
+                self.db.execute("DELETE FROM notes WHERE is_trashed = 1")
+            else:
+                rows = [(note_id,) for note_id in note_ids]
+                if not self.db.execute_many("""
+                    DELETE FROM notes WHERE id = ? AND is_trashed = 1
+                """, rows):
+                    return False
+            
             logger.info("Emptied trash")
             return True
         
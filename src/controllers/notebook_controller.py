@@ -3,11 +3,34 @@ import logging
 from typing import List, Optional
 from datetime import datetime
 
-from src.models.notebook import Notebook
+from src.models.notebook import Notebook, NOTEBOOK_COLUMNS
 from src.core.database import Database
 
 logger = logging.getLogger(__name__)
 
+# Write statements kept as constants so the connection's statement cache reuses
+# them; the insert takes Notebook.as_insert_row()
+_INSERT_NOTEBOOK_SQL = (
+    f"INSERT INTO notebooks ({', '.join(NOTEBOOK_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(NOTEBOOK_COLUMNS))})"
+)
+
+_SELECT_NOTEBOOK = f"SELECT {', '.join(NOTEBOOK_COLUMNS)} FROM notebooks"
+
+# note_count is maintained by triggers on notes, so updates never write it.
+# Takes Notebook.as_update_row()
+_UPDATE_NOTEBOOK_SQL = """
+    UPDATE notebooks SET
+        name = ?, parent_id = ?, color = ?, icon = ?, modified_at = ?,
+        is_default = ?, sort_order = ?
+    WHERE id = ?
+"""
+
+
+def _now_iso() -> str:
+    """Current local time in the ISO format stored in the notebooks table."""
+    return datetime.now().isoformat()
+
 
 class NotebookController:
     """Controller for notebook/folder operations."""
@@ -19,8 +42,8 @@ class NotebookController:
     
     def _ensure_default_notebook(self):
         """Ensure a default notebook exists."""
-        result = self.db.query_one("""
-            SELECT * FROM notebooks WHERE is_default = 1
+        result = self.db.query_scalar("""
+            SELECT 1 FROM notebooks WHERE is_default = 1 LIMIT 1
         """)
         
         if not result:
@@ -49,18 +72,7 @@ class NotebookController:
                     name = "New Notebook"
                 notebook = Notebook.create_new(name, parent_id)
             
-            data = notebook.to_dict()
-            
-            self.db.execute("""
-                INSERT INTO notebooks (
-                    id, name, parent_id, color, icon, created_at, modified_at,
-                    note_count, is_default, sort_order
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                data['id'], data['name'], data['parent_id'], data['color'], data['icon'],
-                data['created_at'], data['modified_at'], data['note_count'],
-                data['is_default'], data['sort_order']
-            ))
+            self.db.execute(_INSERT_NOTEBOOK_SQL, notebook.as_insert_row())
             
             logger.info(f"Created notebook: {notebook.id} - {notebook.name}")
             return notebook
@@ -72,12 +84,12 @@ class NotebookController:
     def get_notebook(self, notebook_id: str) -> Optional[Notebook]:
         """Get notebook by ID."""
         try:
-            result = self.db.query_one("""
-                SELECT * FROM notebooks WHERE id = ?
+            result = self.db.query_one(f"""
+                {_SELECT_NOTEBOOK} WHERE id = ?
             """, (notebook_id,))
             
             if result:
-                return Notebook.from_dict(dict(result))
+                return Notebook.from_row(result)
             return None
         
         except Exception as e:
@@ -87,21 +99,12 @@ class NotebookController:
     def get_all_notebooks(self) -> List[Notebook]:
         """Get all notebooks ordered by sort_order."""
         try:
-            results = self.db.query_all("""
-                SELECT * FROM notebooks ORDER BY sort_order, name
+            # note_count is kept current by triggers, so no aggregation here
+            results = self.db.query_all(f"""
+                {_SELECT_NOTEBOOK} ORDER BY sort_order, name
             """)
             
-            notebooks = [Notebook.from_dict(dict(row)) for row in results]
-            
-            # Update note counts
-            for notebook in notebooks:
-                count_result = self.db.query_one("""
-                    SELECT COUNT(*) as count FROM notes 
-                    WHERE notebook_id = ? AND is_trashed = 0
-                """, (notebook.id,))
-                notebook.note_count = count_result['count'] if count_result else 0
-            
-            return notebooks
+            return [Notebook.from_row(row) for row in results]
         
         except Exception as e:
             logger.error(f"Failed to get all notebooks: {e}")
@@ -110,12 +113,12 @@ class NotebookController:
     def get_default_notebook(self) -> Optional[Notebook]:
         """Get the default notebook."""
         try:
-            result = self.db.query_one("""
-                SELECT * FROM notebooks WHERE is_default = 1
+            result = self.db.query_one(f"""
+                {_SELECT_NOTEBOOK} WHERE is_default = 1 LIMIT 1
             """)
             
             if result:
-                return Notebook.from_dict(dict(result))
+                return Notebook.from_row(result)
             return None
         
         except Exception as e:
@@ -126,18 +129,8 @@ class NotebookController:
         """Update a notebook."""
         try:
             notebook.modified_at = datetime.now()
-            data = notebook.to_dict()
             
-            self.db.execute("""
-                UPDATE notebooks SET
-                    name = ?, parent_id = ?, color = ?, icon = ?, modified_at = ?,
-                    note_count = ?, is_default = ?, sort_order = ?
-                WHERE id = ?
-            """, (
-                data['name'], data['parent_id'], data['color'], data['icon'],
-                data['modified_at'], data['note_count'], data['is_default'],
-                data['sort_order'], data['id']
-            ))
+            self.db.execute(_UPDATE_NOTEBOOK_SQL, notebook.as_update_row())
             
             logger.info(f"Updated notebook: {notebook.id}")
             return True
@@ -158,25 +151,24 @@ class NotebookController:
             Success status
         """
         try:
-            # Prevent deleting default notebook
-            notebook = self.get_notebook(notebook_id)
-            if notebook and notebook.is_default:
-                logger.warning("Cannot delete default notebook")
-                return False
-            
-            if move_notes_to:
-                # Move notes to another notebook
-                self.db.execute("""
-                    UPDATE notes SET notebook_id = ? WHERE notebook_id = ?
-                """, (move_notes_to, notebook_id))
-            else:
-                # Delete all notes in notebook (soft delete to trash)
-                self.db.execute("""
-                    UPDATE notes SET is_trashed = 1 WHERE notebook_id = ?
+            with self.db.transaction():
+                if move_notes_to:
+                    # Move notes to another notebook (never out of the default one)
+                    self.db.execute("""
+                        UPDATE notes SET notebook_id = ?
+                        WHERE notebook_id = (
+                            SELECT id FROM notebooks WHERE id = ? AND is_default = 0
+                        )
+                    """, (move_notes_to, notebook_id))
+                
+                # Delete notebook; a trigger sends any notes left in it to the trash
+                cursor = self.db.execute("""
+                    DELETE FROM notebooks WHERE id = ? AND is_default = 0
                 """, (notebook_id,))
             
-            # Delete notebook
-            self.db.execute("DELETE FROM notebooks WHERE id = ?", (notebook_id,))
+            if cursor.rowcount == 0:
+                logger.warning(f"Cannot delete notebook {notebook_id}: missing or default")
+                return False
             
             logger.info(f"Deleted notebook: {notebook_id}")
             return True
@@ -188,11 +180,10 @@ class NotebookController:
     def rename_notebook(self, notebook_id: str, new_name: str) -> bool:
         """Rename a notebook."""
         try:
-            notebook = self.get_notebook(notebook_id)
-            if notebook:
-                notebook.name = new_name
-                return self.update_notebook(notebook)
-            return False
+            cursor = self.db.execute("""
+                UPDATE notebooks SET name = ?, modified_at = ? WHERE id = ?
+            """, (new_name, _now_iso(), notebook_id))
+            return cursor.rowcount > 0
         
         except Exception as e:
             logger.error(f"Failed to rename notebook {notebook_id}: {e}")
@@ -201,20 +192,24 @@ class NotebookController:
     def set_default_notebook(self, notebook_id: str) -> bool:
         """Set a notebook as default."""
         try:
-            # Clear existing default
-            notebooks = self.get_all_notebooks()
-            for nb in notebooks:
-                if nb.is_default:
-                    nb.is_default = False
-                    self.update_notebook(nb)
+            now = _now_iso()
+            
+            # Set new default and clear the old one atomically
+            with self.db.transaction():
+                cursor = self.db.execute("""
+                    UPDATE notebooks SET is_default = 1, modified_at = ? WHERE id = ?
+                """, (now, notebook_id))
+                if cursor.rowcount == 0:
+                    return False
+                
+                self.db.execute("""
+                    UPDATE notebooks SET is_default = 0, modified_at = ?
+                    WHERE is_default = 1 AND id != ?
+                """, (now, notebook_id))
             
-            # Set new default
-            notebook = self.get_notebook(notebook_id)
-            if notebook:
-                notebook.is_default = True
-                return self.update_notebook(notebook)
-            return False
+            logger.info(f"Set default notebook: {notebook_id}")
+            return True
         
         except Exception as e:
             logger.error(f"Failed to set default notebook: {e}")
-            return False
\ No newline at end of file
+            return False
@@ -1,9 +1,19 @@
 import hashlib
+import hmac
+import logging
 import os
-import json
 from pathlib import Path
 from typing import Optional
 import time
+from cryptography.hazmat.primitives.kdf.argon2 import Argon2id
+
+from src.utils import json_utils
+
+logger = logging.getLogger(__name__)
+
+# Characters accepted as "special" by the password strength rules
+_SPECIAL = frozenset("!@#$%^&*()_+-=[]{}|;:,.<>?")
+
 
 class AuthenticationManager:
     """
@@ -11,18 +21,32 @@ class AuthenticationManager:
     Security Controls: Spoofing, Elevation of Privilege
     """
     
+    # Argon2id parameters for new passwords (memory_cost in KiB)
+    ARGON2_PARAMS = {"time_cost": 3, "memory_cost": 65536, "lanes": 4}
+    
+    # PBKDF2 work factor of legacy auth files without their own
+    PBKDF2_ITERATIONS = 100000
+    
     def __init__(self, config_dir: str = None):
         self.config_dir = Path(config_dir or os.path.expanduser("~/.secure-notes"))
         self.config_dir.mkdir(parents=True, exist_ok=True)
         self.auth_file = self.config_dir / "auth.json"
+        self._auth_file_exists = False
+        self._auth_cache: Optional[dict] = None
         self.failed_attempts = 0
         self.lockout_until = 0
         self.MAX_ATTEMPTS = 5
         self.LOCKOUT_DURATION = 300  # 5 minutes
     
+    def _auth_file_present(self) -> bool:
+        """Check for auth.json, skipping the stat once it is known to exist."""
+        if not self._auth_file_exists:
+            self._auth_file_exists = self.auth_file.exists()
+        return self._auth_file_exists
+    
     def is_first_run(self) -> bool:
         """Check if this is first time setup."""
-        return not self.auth_file.exists()
+        return not self._auth_file_present()
     
     def setup_password(self, password: str) -> tuple[bool, str]:
         """
@@ -35,22 +59,40 @@ class AuthenticationManager:
         
         # Generate salt and hash
         salt = os.urandom(32)
-        password_hash = self._hash_password(password, salt)
+        password_hash = self._hash_password_argon2(password, salt, self.ARGON2_PARAMS)
         
         auth_data = {
-            "password_hash": password_hash.hex(),
-            "salt": salt.hex(),
+            "algo": "argon2id",
+            "params": dict(self.ARGON2_PARAMS),
+            "password_hash": password_hash,
+            "salt": salt,
             "created_at": time.time()
         }
+        self._write_auth(auth_data)
         
-        with open(self.auth_file, 'w') as f:
-            json.dump(auth_data, f)
+        return True, "Password setup successful"
+    
+    def _load_auth(self) -> dict:
+        """Read auth.json once, with salt and hash decoded to bytes."""
+        if self._auth_cache is None:
+            auth_data = json_utils.loads(self.auth_file.read_bytes())
+            auth_data["password_hash"] = bytes.fromhex(auth_data["password_hash"])
+            auth_data["salt"] = bytes.fromhex(auth_data["salt"])
+            self._auth_cache = auth_data
+        return self._auth_cache
+    
+    def _write_auth(self, auth_data: dict):
+        """Write auth.json readable by the current user only."""
+        stored = dict(auth_data,
+                      password_hash=auth_data["password_hash"].hex(),
+                      salt=auth_data["salt"].hex())
+        self.auth_file.write_bytes(json_utils.dumps(stored))
+        self._auth_file_exists = True
+        self._auth_cache = auth_data
         
         # Secure file permissions (Unix-like systems)
         if os.name != 'nt':
             os.chmod(self.auth_file, 0o600)
-        
-        return True, "Password setup successful"
     
     def verify_password(self, password: str) -> tuple[bool, str]:
         """
@@ -62,20 +104,24 @@ class AuthenticationManager:
             remaining = int(self.lockout_until - time.time())
             return False, f"Account locked. Try again in {remaining} seconds"
         
-        if not self.auth_file.exists():
+        if not self._auth_file_present():
             return False, "No password configured"
         
         try:
-            with open(self.auth_file, 'r') as f:
-                auth_data = json.load(f)
-            
-            stored_hash = bytes.fromhex(auth_data["password_hash"])
-            salt = bytes.fromhex(auth_data["salt"])
+            auth_data = self._load_auth()
+            stored_hash = auth_data["password_hash"]
+            salt = auth_data["salt"]
             
-            computed_hash = self._hash_password(password, salt)
+            if auth_data.get("algo") == "argon2id":
+                computed_hash = self._hash_password_argon2(password, salt, auth_data["params"])
+            else:
+                iterations = auth_data.get("iterations", 100000)
+                computed_hash = self._hash_password(password, salt, iterations)
             
-            if computed_hash == stored_hash:
+            if hmac.compare_digest(computed_hash, stored_hash):
                 self.failed_attempts = 0
+                if auth_data.get("algo") != "argon2id":
+                    self._upgrade_hash(password, auth_data)
                 return True, "Authentication successful"
             else:
                 self.failed_attempts += 1
@@ -87,9 +133,40 @@ class AuthenticationManager:
         except Exception as e:
             return False, f"Authentication error: {str(e)}"
     
-    def _hash_password(self, password: str, salt: bytes) -> bytes:
-        """Hash password with PBKDF2-HMAC-SHA256."""
-        return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, 100000)
+    def _hash_password(self, password: str, salt: bytes,
+                       iterations: Optional[int] = None) -> bytes:
+        """Hash password with PBKDF2-HMAC-SHA256 (OpenSSL-backed in hashlib)."""
+        return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt,
+                                   iterations or self.PBKDF2_ITERATIONS)
+    
+    def _hash_password_argon2(self, password: str, salt: bytes, params: dict) -> bytes:
+        """Hash password with Argon2id."""
+        kdf = Argon2id(
+            salt=salt,
+            length=32,
+            iterations=params["time_cost"],
+            lanes=params["lanes"],
+            memory_cost=params["memory_cost"]
+        )
+        return kdf.derive(password.encode('utf-8'))
+    
+    def _upgrade_hash(self, password: str, auth_data: dict):
+        """Re-hash a verified legacy PBKDF2 password with Argon2id, keeping its salt."""
+        try:
+            password_hash = self._hash_password_argon2(
+                password, auth_data["salt"], self.ARGON2_PARAMS)
+            
+            upgraded = dict(auth_data)
+            upgraded.pop("iterations", None)
+            upgraded.update(
+                algo="argon2id",
+                params=dict(self.ARGON2_PARAMS),
+                password_hash=password_hash
+            )
+            self._write_auth(upgraded)
+        except Exception as e:
+            # Keep the legacy hash; the upgrade is retried on the next login
+            logger.warning(f"Password hash upgrade failed: {e}")
     
     def _validate_password_strength(self, password: str) -> tuple[bool, str]:
         """
@@ -98,10 +175,18 @@ class AuthenticationManager:
         if len(password) < 12:
             return False, "Password must be at least 12 characters"
         
-        has_upper = any(c.isupper() for c in password)
-        has_lower = any(c.islower() for c in password)
-        has_digit = any(c.isdigit() for c in password)
-        has_special = any(c in "!@#$%^&*()_+-=[]{}|;:,.<>?" for c in password)
+        has_upper = has_lower = has_digit = has_special = False
+        for c in password:
+            if c.isupper():
+                has_upper = True
+            elif c.islower():
+                has_lower = True
+            elif c.isdigit():
+                has_digit = True
+            elif c in _SPECIAL:
+                has_special = True
+            if has_upper and has_lower and has_digit and has_special:
+                break
         
         if not (has_upper and has_lower and has_digit and has_special):
             return False, "Password must contain uppercase, lowercase, digit, and special character"
@@ -110,9 +195,7 @@ class AuthenticationManager:
     
     def get_salt(self) -> Optional[bytes]:
         """Retrieve salt for encryption key derivation."""
-        if not self.auth_file.exists():
+        if not self._auth_file_present():
             return None
         
-        with open(self.auth_file, 'r') as f:
-            auth_data = json.load(f)
-        return bytes.fromhex(auth_data["salt"])
\ No newline at end of file
+        return self._load_auth()["salt"]
\ No newline at end of file
@@ -1,13 +1,24 @@
 """Authentication manager with secure password verification."""
 import logging
+import re
 import time
-import json
 from pathlib import Path
 from typing import Optional, Tuple
 from datetime import datetime
 
+from src.utils import json_utils
+
 logger = logging.getLogger(__name__)
 
+# Characters accepted as "special" by the password strength rules
+_SPECIAL = frozenset("!@#$%^&*()_+-=[]{}|;:,.<>?/~`")
+
+# Common weak substrings, matched case-insensitively in one scan
+_WEAK_RE = re.compile(
+    '|'.join(map(re.escape, ['password', '12345', 'qwerty', 'admin', 'letmein'])),
+    re.IGNORECASE
+)
+
 
 class AccountLockedError(Exception):
     """Raised when account is locked due to failed attempts."""
@@ -34,15 +45,31 @@ class AuthenticationManager:
         self.config_dir.mkdir(parents=True, exist_ok=True)
         
         self.auth_file = self.config_dir / "auth.json"
+        self._auth_file_exists = False
+        self._auth_cache: Optional[dict] = None
         self.failed_attempts = 0
         self.lockout_until = None
         self.encryption_key: Optional[bytes] = None
         
         logger.info("AuthenticationManager initialized")
     
+    def _auth_file_present(self) -> bool:
+        """Check for auth.json, skipping the stat once it is known to exist."""
+        if not self._auth_file_exists:
+            self._auth_file_exists = self.auth_file.exists()
+        return self._auth_file_exists
+    
+    def _load_auth(self) -> dict:
+        """Read auth.json once, with the salt decoded to bytes."""
+        if self._auth_cache is None:
+            auth_data = json_utils.loads(self.auth_file.read_bytes())
+            auth_data["salt"] = bytes.fromhex(auth_data["salt"])
+            self._auth_cache = auth_data
+        return self._auth_cache
+    
     def is_first_run(self) -> bool:
         """Check if this is first time setup."""
-        return not self.auth_file.exists()
+        return not self._auth_file_present()
     
     def setup_master_password(self, password: str) -> Tuple[bool, str]:
         """
@@ -60,12 +87,10 @@ class AuthenticationManager:
             return False, message
         
         try:
-            # Use encryption service to derive and store
+            # Only the salt is stored; the key is derived once, at unlock
+            import secrets
             from src.core.encryption import EncryptionService
-            encryption = EncryptionService()
-            
-            # Derive key and get salt
-            key, salt = encryption.derive_key(password)
+            salt = secrets.token_bytes(EncryptionService.SALT_SIZE)
             
             # Store authentication data
             auth_data = {
@@ -74,8 +99,9 @@ class AuthenticationManager:
                 "version": "1.0"
             }
             
-            with open(self.auth_file, 'w') as f:
-                json.dump(auth_data, f, indent=2)
+            self.auth_file.write_bytes(json_utils.dumps(auth_data, indent=True))
+            self._auth_file_exists = True
+            self._auth_cache = None
             
             # Secure file permissions (Unix-like systems)
             import os
@@ -110,15 +136,11 @@ class AuthenticationManager:
                 f"Account locked due to failed attempts. Try again in {remaining} seconds."
             )
         
-        if not self.auth_file.exists():
+        if not self._auth_file_present():
             raise AuthenticationError("No password configured")
         
         try:
-            # Load auth data
-            with open(self.auth_file, 'r') as f:
-                auth_data = json.load(f)
-            
-            salt = bytes.fromhex(auth_data["salt"])
+            salt = self._load_auth()["salt"]
             
             # Derive key using same salt
             from src.core.encryption import EncryptionService
@@ -198,10 +220,18 @@ class AuthenticationManager:
         if len(password) > 128:
             return False, "Password must not exceed 128 characters"
         
-        has_upper = any(c.isupper() for c in password)
-        has_lower = any(c.islower() for c in password)
-        has_digit = any(c.isdigit() for c in password)
-        has_special = any(c in "!@#$%^&*()_+-=[]{}|;:,.<>?/~`" for c in password)
+        has_upper = has_lower = has_digit = has_special = False
+        for c in password:
+            if c.isupper():
+                has_upper = True
+            elif c.islower():
+                has_lower = True
+            elif c.isdigit():
+                has_digit = True
+            elif c in _SPECIAL:
+                has_special = True
+            if has_upper and has_lower and has_digit and has_special:
+                break
         
         missing = []
         if not has_upper:
@@ -217,11 +247,9 @@ class AuthenticationManager:
             return False, f"Password must contain: {', '.join(missing)}"
         
         # Check for common weak patterns
-        weak_patterns = ['password', '12345', 'qwerty', 'admin', 'letmein']
-        password_lower = password.lower()
-        for pattern in weak_patterns:
-            if pattern in password_lower:
-                return False, f"Password contains common weak pattern: {pattern}"
+        match = _WEAK_RE.search(password)
+        if match:
+            return False, f"Password contains common weak pattern: {match.group().lower()}"
         
         return True, "Password meets requirements"
     
@@ -251,26 +279,28 @@ class AuthenticationManager:
             strength += 10
         
         # Character variety
-        if any(c.islower() for c in password):
-            strength += 10
-        if any(c.isupper() for c in password):
-            strength += 10
-        if any(c.isdigit() for c in password):
-            strength += 10
-        if any(not c.isalnum() for c in password):
-            strength += 10
+        has_lower = has_upper = has_digit = has_other = False
+        for c in password:
+            if c.islower():
+                has_lower = True
+            elif c.isupper():
+                has_upper = True
+            elif c.isdigit():
+                has_digit = True
+            elif not c.isalnum():
+                has_other = True
+        
+        strength += 10 * (has_lower + has_upper + has_digit + has_other)
         
         return min(strength, 100)
     
     def get_stored_salt(self) -> Optional[bytes]:
         """Get stored salt for key derivation."""
-        if not self.auth_file.exists():
+        if not self._auth_file_present():
             return None
         
         try:
-            with open(self.auth_file, 'r') as f:
-                auth_data = json.load(f)
-            return bytes.fromhex(auth_data["salt"])
+            return self._load_auth()["salt"]
         except Exception as e:
             logger.error(f"Failed to retrieve salt: {e}")
             return None
@@ -1,11 +1,25 @@
 import os
-import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+
+from src.utils import json_utils
 
 logger = logging.getLogger(__name__)
 
+# One writer thread keeps saves off the UI thread and in the order they were
+# made; its queue is drained before the interpreter exits
+_save_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_save_executor() -> ThreadPoolExecutor:
+    """Return the shared config writer, creating it on first use."""
+    global _save_executor
+    if _save_executor is None:
+        _save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='config-save')
+    return _save_executor
+
 
 class AppConfig:
     """Application configuration manager."""
@@ -35,9 +49,10 @@ class AppConfig:
             "password_salt": None,
         }
         
-        self.config: Dict[str, Any] = {}
+        # Defaults until the file is read on first access
+        self.config: Dict[str, Any] = dict(self.defaults)
+        self._loaded = False
         self._ensure_app_directory()
-        self.load()
     
     def _ensure_app_directory(self):
         """Create application directory if it doesn't exist."""
@@ -49,11 +64,11 @@ class AppConfig:
             raise
     
     def load(self):
-        """Load configuration from file."""
+        """Load configuration from file, filling missing keys from the defaults."""
+        self._loaded = True
         try:
             if self.config_file.exists():
-                with open(self.config_file, 'r') as f:
-                    self.config = json.load(f)
+                self.config = {**self.defaults, **json_utils.loads(self.config_file.read_bytes())}
                 logger.info("Configuration loaded")
             else:
                 self.config = self.defaults.copy()
@@ -62,28 +77,50 @@ class AppConfig:
             logger.error(f"Failed to load configuration: {e}")
             self.config = self.defaults.copy()
     
+    def _ensure_loaded(self):
+        """Read the config file on first access."""
+        if not self._loaded:
+            self.load()
+    
     def save(self):
-        """Save configuration to file."""
+        """Save configuration to file in the background."""
+        try:
+            self._ensure_loaded()
+            # Serialize now so later set() calls don't leak into this save
+            data = json_utils.dumps(self.config)
+            _get_save_executor().submit(self._write_file, data)
+        except Exception as e:
+            logger.error(f"Failed to save configuration: {e}")
+    
+    def _write_file(self, data: bytes):
+        """Write config bytes on the writer thread."""
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=4)
+            # Write a sibling file and swap it in, so a crash mid-write
+            # never leaves a truncated config behind
+            tmp_file = self.config_file.with_name(self.config_file.name + ".tmp")
+            tmp_file.write_bytes(data)
+            os.replace(tmp_file, self.config_file)
             logger.info("Configuration saved")
         except Exception as e:
             logger.error(f"Failed to save configuration: {e}")
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get configuration value."""
+        self._ensure_loaded()
         return self.config.get(key, default)
     
     def set(self, key: str, value: Any):
         """Set configuration value."""
+        self._ensure_loaded()
         self.config[key] = value
     
     def is_first_run(self) -> bool:
         """Check if this is the first run."""
-        return self.config.get("first_run", True)
+        self._ensure_loaded()
+        return self.config["first_run"]
     
     def mark_initialized(self):
         """Mark application as initialized."""
+        self._ensure_loaded()
         self.config["first_run"] = False
         self.save()
\ No newline at end of file
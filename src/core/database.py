@@ -1,41 +1,335 @@
 """Enhanced database with complete schema and query methods."""
+import atexit
 import sqlite3
 import logging
+import queue
+import tempfile
+import threading
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Any, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Any, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Applied to every new connection. Write-ahead log with relaxed syncing means
+# one fsync per checkpoint instead of one per commit, and readers never wait on
+# the writer; hot pages are served from the memory map and the page cache
+# (~64 MB on the long-lived read-write connection, ~20 MB per pooled reader).
+# page_size and auto_vacuum only take effect on new databases (auto_vacuum
+# also after a full VACUUM); 8 KB pages keep the B-trees shallower and
+# auto_vacuum lets free pages be reclaimed a few at a time. Existing 4 KB
+# files keep their pages, and restore() rebuilds 4 KB backups at the live page
+# size. The memory map covers databases up to 1 GB and is clamped to the file size.
+_CONNECTION_PRAGMAS = """
+    PRAGMA page_size = 8192;
+    PRAGMA auto_vacuum = INCREMENTAL;
+    PRAGMA journal_mode = WAL;
+    PRAGMA synchronous = NORMAL;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA cache_size = -65536;
+    PRAGMA mmap_size = 1073741824;
+    PRAGMA foreign_keys = ON;
+"""
+
+# Read-only pool connections only need the caching pragmas
+_READ_PRAGMAS = """
+    PRAGMA temp_store = MEMORY;
+    PRAGMA cache_size = -20000;
+    PRAGMA mmap_size = 1073741824;
+"""
+
+# Stored in PRAGMA user_version once initialize_schema has run; bump it
+# whenever SCHEMA_DDL or a migration changes (0 = created before versioning)
+SCHEMA_VERSION = 3
+
+# Indexes replaced by the partial indexes in SCHEMA_DDL
+_OBSOLETE_INDEXES = (
+    'idx_notes_modified', 'idx_notes_favorite', 'idx_notes_trashed',
+    'idx_notes_trash_pinned_mod', 'idx_notes_notebook_trash_pinned_mod',
+    'idx_notes_favorite_mod', 'idx_notes_active', 'idx_notes_active_notebook',
+)
+
+# Full schema, run as one script inside a single transaction. Migrations of
+# older databases happen first so the indexes below find their columns.
+SCHEMA_DDL = "".join(f"DROP INDEX IF EXISTS {index};\n" for index in _OBSOLETE_INDEXES) + """
+    -- Notes table with all fields
+    CREATE TABLE IF NOT EXISTS notes (
+        id TEXT PRIMARY KEY,
+        title BLOB NOT NULL,
+        content BLOB NOT NULL,
+        notebook_id TEXT,
+        tags TEXT DEFAULT '',
+        created_at TEXT NOT NULL,
+        modified_at TEXT NOT NULL,
+        is_favorite INTEGER DEFAULT 0,
+        is_pinned INTEGER DEFAULT 0,
+        is_archived INTEGER DEFAULT 0,
+        is_trashed INTEGER DEFAULT 0,
+        color TEXT,
+        attachments TEXT DEFAULT '',
+        images TEXT DEFAULT '',
+        links TEXT DEFAULT '',
+        has_tasks INTEGER DEFAULT 0,
+        completed_tasks INTEGER DEFAULT 0,
+        total_tasks INTEGER DEFAULT 0,
+        word_count INTEGER DEFAULT 0,
+        character_count INTEGER DEFAULT 0,
+        reading_time INTEGER DEFAULT 0,
+        encrypted INTEGER DEFAULT 1,
+        encryption_version TEXT DEFAULT '1.0',
+        created_at_ms INTEGER,
+        modified_at_ms INTEGER,
+        FOREIGN KEY (notebook_id) REFERENCES notebooks(id)
+    );
+
+    -- Notebooks table
+    CREATE TABLE IF NOT EXISTS notebooks (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        parent_id TEXT,
+        color TEXT,
+        icon TEXT DEFAULT '📓',
+        created_at TEXT NOT NULL,
+        modified_at TEXT NOT NULL,
+        note_count INTEGER DEFAULT 0,
+        is_default INTEGER DEFAULT 0,
+        sort_order INTEGER DEFAULT 0,
+        FOREIGN KEY (parent_id) REFERENCES notebooks(id)
+    );
+
+    -- Tags table
+    CREATE TABLE IF NOT EXISTS tags (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        color TEXT,
+        created_at TEXT NOT NULL,
+        note_count INTEGER DEFAULT 0
+    );
+
+    -- Attachments table
+    CREATE TABLE IF NOT EXISTS attachments (
+        id TEXT PRIMARY KEY,
+        note_id TEXT NOT NULL,
+        filename TEXT NOT NULL,
+        file_path TEXT NOT NULL,
+        file_size INTEGER NOT NULL,
+        mime_type TEXT,
+        created_at TEXT NOT NULL,
+        FOREIGN KEY (note_id) REFERENCES notes(id) ON DELETE CASCADE
+    );
+
+    -- Full index on the foreign key, used by notebook deletes
+    CREATE INDEX IF NOT EXISTS idx_notes_notebook
+    ON notes(notebook_id);
+
+    -- Partial indexes matching the note list queries (filter + order); each
+    -- only holds the rows its list can show
+    CREATE INDEX IF NOT EXISTS idx_notes_active_pinned_mod
+    ON notes(is_pinned DESC, modified_at_ms DESC) WHERE is_trashed = 0;
+
+    CREATE INDEX IF NOT EXISTS idx_notes_notebook_active_pinned_mod
+    ON notes(notebook_id, is_pinned DESC, modified_at_ms DESC) WHERE is_trashed = 0;
+
+    CREATE INDEX IF NOT EXISTS idx_notes_favorites_mod
+    ON notes(modified_at_ms DESC) WHERE is_favorite = 1 AND is_trashed = 0;
+
+    CREATE INDEX IF NOT EXISTS idx_notes_trashed_mod
+    ON notes(modified_at_ms DESC) WHERE is_trashed = 1;
+
+    -- Partial index: the single default notebook row
+    CREATE INDEX IF NOT EXISTS idx_notebooks_default
+    ON notebooks(is_default) WHERE is_default = 1;
+
+    -- Sidebar order, so listing notebooks needs no sort
+    CREATE INDEX IF NOT EXISTS idx_notebooks_sort
+    ON notebooks(sort_order, name);
+
+    -- Deleting a notebook trashes its remaining notes and hands them to
+    -- the default notebook, so the delete itself is a single statement
+    CREATE TRIGGER IF NOT EXISTS notebooks_delete_trash_notes
+    BEFORE DELETE ON notebooks
+    BEGIN
+        UPDATE notes SET
+            is_trashed = 1,
+            notebook_id = (SELECT id FROM notebooks WHERE is_default = 1 AND id != OLD.id)
+        WHERE notebook_id = OLD.id;
+    END;
+
+    -- Keep notebooks.note_count equal to the notebook's live (untrashed) notes
+    CREATE TRIGGER IF NOT EXISTS notes_count_insert AFTER INSERT ON notes
+    WHEN NEW.is_trashed = 0
+    BEGIN
+        UPDATE notebooks SET note_count = note_count + 1 WHERE id = NEW.notebook_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS notes_count_delete AFTER DELETE ON notes
+    WHEN OLD.is_trashed = 0
+    BEGIN
+        UPDATE notebooks SET note_count = note_count - 1 WHERE id = OLD.notebook_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS notes_count_update AFTER UPDATE OF is_trashed, notebook_id ON notes
+    WHEN OLD.is_trashed IS NOT NEW.is_trashed OR OLD.notebook_id IS NOT NEW.notebook_id
+    BEGIN
+        UPDATE notebooks SET note_count = note_count - 1
+        WHERE id = OLD.notebook_id AND OLD.is_trashed = 0;
+        UPDATE notebooks SET note_count = note_count + 1
+        WHERE id = NEW.notebook_id AND NEW.is_trashed = 0;
+    END;
+
+    -- Counters may predate the triggers; the triggers keep them in line after
+    UPDATE notebooks SET note_count = (
+        SELECT COUNT(*) FROM notes
+        WHERE notes.notebook_id = notebooks.id AND notes.is_trashed = 0
+    );
+
+    -- Planner statistics, so the indexes above get picked
+    ANALYZE;
+"""
+
+
+@lru_cache(maxsize=64)
+def in_clause(size: int) -> str:
+    """Placeholder list "(?, ?, ...)" for an IN clause of this many values."""
+    return "(" + ", ".join("?" * size) + ")"
+
+
+def in_clause_params(values) -> Tuple[str, tuple]:
+    """
+    Placeholders and parameters for "column IN ...".
+    
+    The values are padded with NULLs up to the next power of two, so batches of
+    similar size share one SQL string and one cached prepared statement. NULL
+    never matches, which makes this unsuitable for NOT IN.
+    """
+    values = tuple(values)
+    size = 1 << max(len(values) - 1, 0).bit_length()
+    return in_clause(size), values + (None,) * (size - len(values))
+
 
 class Database:
     """SQLite database manager with complete schema."""
     
+    # Prepared statements kept per connection; all of the app's SQL fits
+    STATEMENT_CACHE_SIZE = 256
+    
+    # Backups copy this many pages per step, pausing between steps (seconds)
+    BACKUP_STEP_PAGES = 100
+    BACKUP_STEP_SLEEP = 0.01
+    
+    # Read-only connections for query_one/query_all; in WAL mode they read
+    # committed data without waiting on the read-write connection
+    READ_POOL_SIZE = 2
+    
+    # Seconds a connection waits on another's lock before SQLITE_BUSY;
+    # SQLite sleeps and retries internally for this long
+    BUSY_TIMEOUT = 5.0
+    
+    # Attempts for a statement outside a transaction that still finds the
+    # database locked (e.g. a busy error SQLite returns without waiting)
+    EXECUTE_ATTEMPTS = 3
+    
     def __init__(self, db_path: Path):
         """Initialize database connection."""
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self.connection = None
+        self._read_pool: Optional[queue.Queue] = None
+        self._in_transaction = False
+        self._transaction_thread: Optional[int] = None
+        # Schema metadata only changes during initialize_schema and restore
+        self._table_info_cache: Dict[str, List[sqlite3.Row]] = {}
+        self._existing_tables: Set[str] = set()
+        # The connection is shared across threads; statements and whole
+        # transactions run under this lock so they never interleave
+        self._lock = threading.RLock()
         self.connect()
         self.initialize_schema()
+        # Close cleanly at interpreter exit even if the owner never does;
+        # finalizers are not guaranteed to run during shutdown
+        atexit.register(self.close)
         logger.info(f"Database initialized: {self.db_path}")
     
     def connect(self):
         """Establish database connection."""
         try:
-            self.connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            # Autocommit mode: transactions are only opened explicitly via begin()
+            self.connection = sqlite3.connect(
+                str(self.db_path), isolation_level=None, check_same_thread=False,
+                cached_statements=self.STATEMENT_CACHE_SIZE, timeout=self.BUSY_TIMEOUT
+            )
             self.connection.row_factory = sqlite3.Row
-            # Enable foreign keys
-            self.connection.execute("PRAGMA foreign_keys = ON")
+            self.connection.executescript(_CONNECTION_PRAGMAS)
+            
+            self._read_pool = queue.Queue()
+            for _ in range(self.READ_POOL_SIZE):
+                self._read_pool.put(self._open_read_connection())
             logger.debug("Database connection established")
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
             raise
     
+    def _open_read_connection(self) -> sqlite3.Connection:
+        """Open a read-only connection for the read pool."""
+        connection = sqlite3.connect(
+            f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True,
+            check_same_thread=False, cached_statements=self.STATEMENT_CACHE_SIZE,
+            timeout=self.BUSY_TIMEOUT
+        )
+        connection.row_factory = sqlite3.Row
+        connection.executescript(_READ_PRAGMAS)
+        return connection
+    
+    def _uses_writer(self, writer: bool) -> bool:
+        """Whether a read runs on the read-write connection (see _reader)."""
+        return writer or (self._in_transaction
+                          and self._transaction_thread == threading.get_ident())
+    
+    @contextmanager
+    def _reader(self, writer: bool = False):
+        """
+        Lend a connection for a read.
+        
+        Reads inside the calling thread's own transaction (or that ask for the
+        writer) use the read-write connection, so they see uncommitted changes
+        and TEMP tables; everything else borrows a pooled read-only connection.
+        If the pool stays empty for BUSY_TIMEOUT (e.g. a caller abandoned an
+        iter_query iterator), the read gets a connection of its own instead.
+        """
+        if self.connection is None or self._read_pool is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        
+        if self._uses_writer(writer):
+            with self._lock:
+                yield self.connection
+            return
+        
+        pool = self._read_pool
+        try:
+            connection = pool.get(timeout=self.BUSY_TIMEOUT)
+        except queue.Empty:
+            logger.warning("Read pool exhausted; opening an extra read connection")
+            connection = self._open_read_connection()
+            pool = None
+        
+        try:
+            yield connection
+        finally:
+            # Connections lent before close() (or extra ones) are not pooled again
+            if pool is not None and pool is self._read_pool:
+                pool.put(connection)
+            else:
+                connection.close()
+    
     def initialize_schema(self):
         """Create all required tables."""
-        cursor = self.connection.cursor()
-        
         try:
+            # Up-to-date databases skip all schema introspection
+            if self._schema_version() >= SCHEMA_VERSION:
+                logger.debug("Database schema up to date")
+                return
+            
             # Check if schema needs migration
             needs_migration = self._check_schema_migration()
             
@@ -43,100 +337,14 @@ class Database:
                 logger.info("Schema migration needed, recreating tables...")
                 self._drop_old_schema()
             
-            # Notes table with all fields
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS notes (
-                    id TEXT PRIMARY KEY,
-                    title TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    notebook_id TEXT,
-                    tags TEXT DEFAULT '',
-                    created_at TEXT NOT NULL,
-                    modified_at TEXT NOT NULL,
-                    is_favorite INTEGER DEFAULT 0,
-                    is_pinned INTEGER DEFAULT 0,
-                    is_archived INTEGER DEFAULT 0,
-                    is_trashed INTEGER DEFAULT 0,
-                    color TEXT,
-                    attachments TEXT DEFAULT '',
-                    images TEXT DEFAULT '',
-                    links TEXT DEFAULT '',
-                    has_tasks INTEGER DEFAULT 0,
-                    completed_tasks INTEGER DEFAULT 0,
-                    total_tasks INTEGER DEFAULT 0,
-                    word_count INTEGER DEFAULT 0,
-                    character_count INTEGER DEFAULT 0,
-                    reading_time INTEGER DEFAULT 0,
-                    encrypted INTEGER DEFAULT 1,
-                    encryption_version TEXT DEFAULT '1.0',
-                    FOREIGN KEY (notebook_id) REFERENCES notebooks(id)
-                )
-            """)
-            
-            # Notebooks table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS notebooks (
-                    id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    parent_id TEXT,
-                    color TEXT,
-                    icon TEXT DEFAULT '📓',
-                    created_at TEXT NOT NULL,
-                    modified_at TEXT NOT NULL,
-                    note_count INTEGER DEFAULT 0,
-                    is_default INTEGER DEFAULT 0,
-                    sort_order INTEGER DEFAULT 0,
-                    FOREIGN KEY (parent_id) REFERENCES notebooks(id)
-                )
-            """)
-            
-            # Tags table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS tags (
-                    id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL UNIQUE,
-                    color TEXT,
-                    created_at TEXT NOT NULL,
-                    note_count INTEGER DEFAULT 0
-                )
-            """)
-            
-            # Attachments table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS attachments (
-                    id TEXT PRIMARY KEY,
-                    note_id TEXT NOT NULL,
-                    filename TEXT NOT NULL,
-                    file_path TEXT NOT NULL,
-                    file_size INTEGER NOT NULL,
-                    mime_type TEXT,
-                    created_at TEXT NOT NULL,
-                    FOREIGN KEY (note_id) REFERENCES notes(id) ON DELETE CASCADE
-                )
-            """)
-            
-            # Create indexes for better performance
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_notes_notebook 
-                ON notes(notebook_id)
-            """)
-            
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_notes_modified 
-                ON notes(modified_at)
-            """)
-            
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_notes_favorite 
-                ON notes(is_favorite)
-            """)
-            
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_notes_trashed 
-                ON notes(is_trashed)
-            """)
+            # Bring older databases up to the current columns first
+            self._add_timestamp_ms_columns()
             
-            self.connection.commit()
+            # All DDL, the counter refresh and the version stamp commit together
+            self.connection.executescript(
+                "BEGIN IMMEDIATE;\n" + SCHEMA_DDL
+                + f"\nPRAGMA user_version = {SCHEMA_VERSION};\nCOMMIT;")
+            self.reload_schema_cache()
             logger.debug("Database schema initialized")
             
         except Exception as e:
@@ -144,31 +352,43 @@ class Database:
             self.connection.rollback()
             raise
     
+    def _schema_version(self) -> int:
+        """Read the schema version stamped in the database header."""
+        return self.connection.execute("PRAGMA user_version").fetchone()[0]
+    
     def _check_schema_migration(self) -> bool:
         """Check if schema needs migration."""
         try:
             # Check if notes table exists and has the correct columns
-            result = self.query_one("""
-                SELECT name FROM sqlite_master 
-                WHERE type='table' AND name='notes'
-            """)
+            columns = [row[1] for row in self.get_table_info('notes')]
             
-            if result:
-                # Check if modified_at column exists
-                cursor = self.connection.cursor()
-                cursor.execute("PRAGMA table_info(notes)")
-                columns = [row[1] for row in cursor.fetchall()]
-                
-                # If modified_at doesn't exist, we need migration
-                if 'modified_at' not in columns:
-                    return True
-            
-            return False
+            # If modified_at doesn't exist, we need migration
+            return bool(columns) and 'modified_at' not in columns
             
         except Exception as e:
             logger.error(f"Schema check failed: {e}")
             return False
     
+    def _add_timestamp_ms_columns(self):
+        """Add and backfill the unix-ms timestamp columns on older databases."""
+        columns = [row[1] for row in self.get_table_info('notes')]
+        if not columns or 'modified_at_ms' in columns:
+            # New databases get the columns from SCHEMA_DDL
+            return
+        
+        logger.info("Adding millisecond timestamp columns to notes")
+        with self.transaction():
+            cursor = self.connection.cursor()
+            self.reload_schema_cache()
+            cursor.execute("ALTER TABLE notes ADD COLUMN created_at_ms INTEGER")
+            cursor.execute("ALTER TABLE notes ADD COLUMN modified_at_ms INTEGER")
+            # Stored ISO strings are local time; 'utc' converts them before the epoch offset
+            cursor.execute("""
+                UPDATE notes SET
+                    created_at_ms = CAST(ROUND((julianday(created_at, 'utc') - 2440587.5) * 86400000) AS INTEGER),
+                    modified_at_ms = CAST(ROUND((julianday(modified_at, 'utc') - 2440587.5) * 86400000) AS INTEGER)
+            """)
+    
     def _drop_old_schema(self):
         """Drop old schema tables."""
         try:
@@ -177,19 +397,32 @@ class Database:
             # Disable foreign keys temporarily
             cursor.execute("PRAGMA foreign_keys = OFF")
             
-            # Drop old tables
-            cursor.execute("DROP TABLE IF EXISTS notes")
-            cursor.execute("DROP TABLE IF EXISTS notebooks")
-            cursor.execute("DROP TABLE IF EXISTS tags")
-            cursor.execute("DROP TABLE IF EXISTS attachments")
-            
-            # Drop old indexes
-            cursor.execute("DROP INDEX IF EXISTS idx_notes_notebook")
-            cursor.execute("DROP INDEX IF EXISTS idx_notes_modified")
-            cursor.execute("DROP INDEX IF EXISTS idx_notes_favorite")
-            cursor.execute("DROP INDEX IF EXISTS idx_notes_trashed")
-            
-            self.connection.commit()
+            # Drop everything in one transaction; foreign key enforcement can
+            # only be switched outside of it
+            self.reload_schema_cache()
+            with self.transaction():
+                # Drop old tables
+                cursor.execute("DROP TABLE IF EXISTS notes")
+                cursor.execute("DROP TABLE IF EXISTS notebooks")
+                cursor.execute("DROP TABLE IF EXISTS tags")
+                cursor.execute("DROP TABLE IF EXISTS attachments")
+                
+                # Drop old indexes
+                for index in _OBSOLETE_INDEXES:
+                    cursor.execute(f"DROP INDEX IF EXISTS {index}")
+                cursor.execute("DROP INDEX IF EXISTS idx_notes_notebook")
+                cursor.execute("DROP INDEX IF EXISTS idx_notes_active_pinned_mod")
+                cursor.execute("DROP INDEX IF EXISTS idx_notes_notebook_active_pinned_mod")
+                cursor.execute("DROP INDEX IF EXISTS idx_notes_favorites_mod")
+                cursor.execute("DROP INDEX IF EXISTS idx_notes_trashed_mod")
+                cursor.execute("DROP INDEX IF EXISTS idx_notebooks_default")
+                cursor.execute("DROP INDEX IF EXISTS idx_notebooks_sort")
+                
+                # Drop triggers
+                cursor.execute("DROP TRIGGER IF EXISTS notes_count_insert")
+                cursor.execute("DROP TRIGGER IF EXISTS notes_count_delete")
+                cursor.execute("DROP TRIGGER IF EXISTS notes_count_update")
+                cursor.execute("DROP TRIGGER IF EXISTS notebooks_delete_trash_notes")
             
             # Re-enable foreign keys
             cursor.execute("PRAGMA foreign_keys = ON")
@@ -198,9 +431,50 @@ class Database:
             
         except Exception as e:
             logger.error(f"Failed to drop old schema: {e}")
-            self.connection.rollback()
             raise
     
+    @contextmanager
+    def transaction(self):
+        """
+        Run several statements in a single transaction.
+        
+        Statements executed inside the block are committed together on exit
+        and rolled back if the block raises. Nested blocks join the outer
+        transaction; other threads wait until it finishes.
+        """
+        with self._lock:
+            if self._in_transaction:
+                yield
+                return
+            
+            self.begin()
+            try:
+                yield
+                self.commit()
+            except Exception:
+                self.rollback()
+                raise
+    
+    def begin(self):
+        """Open an explicit transaction, taking the write lock up front."""
+        self.connection.execute("BEGIN IMMEDIATE")
+        self._in_transaction = True
+        self._transaction_thread = threading.get_ident()
+    
+    def commit(self):
+        """Commit the open transaction."""
+        try:
+            self.connection.execute("COMMIT")
+        finally:
+            self._in_transaction = False
+    
+    def rollback(self):
+        """Roll back the open transaction."""
+        try:
+            self.connection.execute("ROLLBACK")
+        finally:
+            self._in_transaction = False
+    
     def execute(self, query: str, params: Tuple = ()) -> sqlite3.Cursor:
         """
         Execute a query (INSERT, UPDATE, DELETE).
@@ -213,52 +487,155 @@ class Database:
             Cursor object
         """
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(query, params)
-            self.connection.commit()
-            return cursor
+            with self._lock:
+                # Inside a transaction a retry cannot help: the caller has to
+                # roll back, so only standalone statements are retried
+                attempts = 1 if self._in_transaction else self.EXECUTE_ATTEMPTS
+                for attempt in range(1, attempts + 1):
+                    try:
+                        # Connection.execute reuses the prepared statement cache
+                        # without allocating a cursor of our own first
+                        return self.connection.execute(query, params)
+                    except sqlite3.OperationalError as e:
+                        message = str(e)
+                        if attempt == attempts or ('locked' not in message
+                                                   and 'busy' not in message):
+                            raise
+                        logger.warning(f"Database busy, retrying ({attempt}/{attempts})")
         except Exception as e:
             logger.error(f"Query execution failed: {e}\nQuery: {query}\nParams: {params}")
-            self.connection.rollback()
             raise
     
-    def query_one(self, query: str, params: Tuple = ()) -> Optional[sqlite3.Row]:
+    def query_one(self, query: str, params: Tuple = (),
+                  writer: bool = False) -> Optional[sqlite3.Row]:
         """
         Execute query and return one result.
         
         Args:
             query: SQL query
             params: Query parameters
+            writer: Run on the read-write connection (needed for TEMP tables)
             
         Returns:
             Single row or None
         """
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(query, params)
-            return cursor.fetchone()
+            with self._reader(writer) as connection:
+                return connection.execute(query, params).fetchone()
         except Exception as e:
             logger.error(f"Query failed: {e}\nQuery: {query}\nParams: {params}")
             return None
     
-    def query_all(self, query: str, params: Tuple = ()) -> List[sqlite3.Row]:
+    def query_all(self, query: str, params: Tuple = (),
+                  writer: bool = False) -> List[sqlite3.Row]:
         """
         Execute query and return all results.
         
         Args:
             query: SQL query
             params: Query parameters
+            writer: Run on the read-write connection (needed for TEMP tables)
             
         Returns:
             List of rows
         """
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(query, params)
-            return cursor.fetchall()
+            with self._reader(writer) as connection:
+                return connection.execute(query, params).fetchall()
+        except Exception as e:
+            logger.error(f"Query failed: {e}\nQuery: {query}\nParams: {params}")
+            return []
+    
+    def query_scalar(self, query: str, params: Tuple = (), default: Any = None,
+                     writer: bool = False) -> Any:
+        """
+        Execute query and return the first column of the first row.
+        
+        Rows come back as plain tuples, skipping sqlite3.Row construction.
+        
+        Args:
+            query: SQL query
+            params: Query parameters
+            default: Returned when there is no row
+            writer: Run on the read-write connection (needed for TEMP tables)
+            
+        Returns:
+            Single value or default
+        """
+        try:
+            with self._reader(writer) as connection:
+                cursor = connection.cursor()
+                cursor.row_factory = None
+                row = cursor.execute(query, params).fetchone()
+            return row[0] if row else default
         except Exception as e:
             logger.error(f"Query failed: {e}\nQuery: {query}\nParams: {params}")
+            return default
+    
+    def fetch_many_by_id(self, table: str, ids: List[str]) -> List[sqlite3.Row]:
+        """
+        Fetch the rows of a table whose id is in ids.
+        
+        Args:
+            table: Table name
+            ids: Row IDs
+            
+        Returns:
+            Matching rows, in no particular order
+        """
+        if not ids:
             return []
+        
+        placeholders, params = in_clause_params(ids)
+        return self.query_all(f"SELECT * FROM {table} WHERE id IN {placeholders}", params)
+    
+    def iter_query(self, query: str, params: Tuple = (), arraysize: int = 512,
+                   writer: bool = False) -> Iterator[sqlite3.Row]:
+        """
+        Execute query and yield results, fetching them in batches.
+        
+        A pooled connection stays borrowed until the iterator is exhausted
+        or closed, so callers that stop early should close it. Reads on the
+        read-write connection fetch every row first, so its lock is never
+        held while the caller consumes them.
+        
+        A query that fails to start is logged and yields nothing; an error
+        after rows have been yielded is raised to the caller, so a partial
+        result is never mistaken for a complete one.
+        
+        Args:
+            query: SQL query
+            params: Query parameters
+            arraysize: Rows fetched per batch
+            writer: Run on the read-write connection (needed for TEMP tables)
+            
+        Yields:
+            Rows
+        """
+        if self._uses_writer(writer):
+            try:
+                with self._reader(writer) as connection:
+                    rows = connection.execute(query, params).fetchall()
+            except Exception as e:
+                logger.error(f"Query failed: {e}\nQuery: {query}\nParams: {params}")
+                return
+            yield from rows
+            return
+        
+        with ExitStack() as stack:
+            try:
+                connection = stack.enter_context(self._reader())
+                cursor = connection.execute(query, params)
+            except Exception as e:
+                logger.error(f"Query failed: {e}\nQuery: {query}\nParams: {params}")
+                return
+            
+            cursor.arraysize = arraysize
+            while True:
+                batch = cursor.fetchmany()
+                if not batch:
+                    return
+                yield from batch
     
     def execute_many(self, query: str, params_list: List[Tuple]) -> bool:
         """
@@ -272,41 +649,72 @@ class Database:
             Success status
         """
         try:
-            cursor = self.connection.cursor()
-            cursor.executemany(query, params_list)
-            self.connection.commit()
+            with self.transaction():
+                self.connection.executemany(query, params_list)
             return True
         except Exception as e:
             logger.error(f"Batch execution failed: {e}")
-            self.connection.rollback()
             return False
     
     def table_exists(self, table_name: str) -> bool:
         """Check if a table exists."""
+        if table_name in self._existing_tables:
+            return True
+        
         result = self.query_one("""
             SELECT name FROM sqlite_master 
             WHERE type='table' AND name=?
         """, (table_name,))
+        if result is not None:
+            self._existing_tables.add(table_name)
         return result is not None
     
     def get_table_info(self, table_name: str) -> List[sqlite3.Row]:
         """Get table schema information."""
-        return self.query_all(f"PRAGMA table_info({table_name})")
+        info = self._table_info_cache.get(table_name)
+        if info is None:
+            info = self.query_all(f"PRAGMA table_info({table_name})")
+            # Missing tables may still be created, so only cache hits
+            if info:
+                self._table_info_cache[table_name] = info
+        return info
     
-    def vacuum(self):
-        """Optimize database (reclaim space)."""
+    def reload_schema_cache(self):
+        """Forget cached table metadata after the schema changes."""
+        self._table_info_cache.clear()
+        self._existing_tables.clear()
+    
+    def vacuum(self, pages: Optional[int] = None):
+        """
+        Optimize database (reclaim space).
+        
+        Args:
+            pages: Free at most this many pages incrementally instead of
+                rebuilding the whole file
+        """
         try:
-            self.connection.execute("VACUUM")
+            with self._lock:
+                if pages is None:
+                    self.connection.execute("VACUUM")
+                else:
+                    # The pragma frees one page per step; execute() would only
+                    # step it once, executescript runs it to completion
+                    self.connection.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
             logger.info("Database vacuumed")
         except Exception as e:
             logger.error(f"Vacuum failed: {e}")
     
-    def backup(self, backup_path: Path) -> bool:
+    def backup(self, backup_path: Path,
+               progress: Optional[Callable[[int, int, int], None]] = None) -> bool:
         """
         Create a backup of the database.
         
+        Pages are copied in small steps from a separate read connection, so
+        this can run on a worker thread while the app keeps using the database.
+        
         Args:
             backup_path: Path to backup file
+            progress: Called as progress(status, remaining, total) after each step
             
         Returns:
             Success status
@@ -314,14 +722,19 @@ class Database:
         try:
             backup_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Create backup connection
+            # Read committed data through its own WAL snapshot, never blocking
+            # (or seeing uncommitted work from) the shared connection
+            source = sqlite3.connect(str(self.db_path))
             backup_conn = sqlite3.connect(str(backup_path))
             
             # Copy database
-            with backup_conn:
-                self.connection.backup(backup_conn)
+            try:
+                source.backup(backup_conn, pages=self.BACKUP_STEP_PAGES,
+                              progress=progress, sleep=self.BACKUP_STEP_SLEEP)
+            finally:
+                backup_conn.close()
+                source.close()
             
-            backup_conn.close()
             logger.info(f"Database backed up to: {backup_path}")
             return True
             
@@ -333,6 +746,10 @@ class Database:
         """
         Restore database from backup.
         
+        Backups written at another page size or by an older version are
+        accepted: the pages are rebuilt at this database's page size first,
+        and the schema is brought up to date afterwards.
+        
         Args:
             backup_path: Path to backup file
             
@@ -344,15 +761,23 @@ class Database:
                 logger.error(f"Backup file not found: {backup_path}")
                 return False
             
-            # Close current connection
-            self.close()
-            
-            # Replace database file
-            import shutil
-            shutil.copy2(backup_path, self.db_path)
+            # Copy the backup's pages into the open connection with SQLite's
+            # backup API; this goes through the WAL and keeps the connection
+            # (and its page cache) instead of overwriting the file under it
+            with self._lock, tempfile.TemporaryDirectory(dir=self.db_path.parent) as scratch:
+                source = self._open_restore_source(backup_path, Path(scratch))
+                try:
+                    source.backup(self.connection)
+                finally:
+                    source.close()
+                
+                self._drop_temp_tables()
+                self.reload_schema_cache()
+                
+                # Backups made before the current schema get its columns,
+                # indexes and triggers (no-op for up-to-date ones)
+                self.initialize_schema()
             
-            # Reconnect
-            self.connect()
             logger.info(f"Database restored from: {backup_path}")
             return True
             
@@ -360,33 +785,66 @@ class Database:
             logger.error(f"Restore failed: {e}")
             return False
     
+    def _open_restore_source(self, backup_path: Path, scratch: Path) -> sqlite3.Connection:
+        """
+        Open a backup for restoring into this database.
+        
+        The backup API copies pages as they are, and a WAL database cannot
+        change its page size, so a backup with other pages is first copied
+        into scratch and rebuilt at this database's page size.
+        """
+        source = sqlite3.connect(f"{backup_path.resolve().as_uri()}?mode=ro", uri=True)
+        page_size = self.connection.execute("PRAGMA page_size").fetchone()[0]
+        if source.execute("PRAGMA page_size").fetchone()[0] == page_size:
+            return source
+        
+        staging = sqlite3.connect(str(scratch / "restore.db"), isolation_level=None)
+        try:
+            source.backup(staging)
+            staging.execute(f"PRAGMA page_size = {page_size}")
+            staging.execute("VACUUM")
+        except Exception:
+            staging.close()
+            raise
+        finally:
+            source.close()
+        return staging
+    
+    def _drop_temp_tables(self):
+        """Drop TEMP tables, which hold state derived from the old contents."""
+        # Virtual tables first; dropping them also drops their shadow tables
+        tables = self.connection.execute("""
+            SELECT name FROM sqlite_temp_master WHERE type = 'table'
+            ORDER BY sql NOT LIKE 'CREATE VIRTUAL TABLE%'
+        """).fetchall()
+        for (name,) in tables:
+            self.connection.execute(f'DROP TABLE IF EXISTS temp."{name}"')
+    
     def get_stats(self) -> dict:
         """Get database statistics."""
         try:
             stats = {}
             
-            # Note counts
-            result = self.query_one("SELECT COUNT(*) as count FROM notes WHERE is_trashed = 0")
-            stats['total_notes'] = result['count'] if result else 0
-            
-            result = self.query_one("SELECT COUNT(*) as count FROM notes WHERE is_favorite = 1")
-            stats['favorite_notes'] = result['count'] if result else 0
-            
-            result = self.query_one("SELECT COUNT(*) as count FROM notes WHERE is_trashed = 1")
-            stats['trashed_notes'] = result['count'] if result else 0
-            
-            # Notebook count
-            result = self.query_one("SELECT COUNT(*) as count FROM notebooks")
-            stats['total_notebooks'] = result['count'] if result else 0
-            
-            # Tag count
-            result = self.query_one("SELECT COUNT(*) as count FROM tags")
-            stats['total_tags'] = result['count'] if result else 0
-            
-            # Database size
-            import os
-            if self.db_path.exists():
-                stats['db_size_bytes'] = os.path.getsize(self.db_path)
+            # Note, notebook and tag counts in one statement. Each note count
+            # walks the partial index for its list instead of scanning notes,
+            # whose flags sit behind the (possibly overflowing) content blob;
+            # favorites (trashed ones included) are the Favorites index plus
+            # the favorites in the trash. The size comes from the page count,
+            # which includes pages still waiting in the WAL.
+            result = self.query_one("""
+                SELECT
+                    (SELECT COUNT(*) FROM notes WHERE is_trashed = 0) AS total_notes,
+                    (SELECT COUNT(*) FROM notes WHERE is_favorite = 1 AND is_trashed = 0)
+                    + (SELECT COUNT(*) FROM notes
+                       WHERE is_favorite = 1 AND is_trashed = 1) AS favorite_notes,
+                    (SELECT COUNT(*) FROM notes WHERE is_trashed = 1) AS trashed_notes,
+                    (SELECT COUNT(*) FROM notebooks) AS total_notebooks,
+                    (SELECT COUNT(*) FROM tags) AS total_tags,
+                    (SELECT page_count * page_size
+                     FROM pragma_page_count(), pragma_page_size()) AS db_size_bytes
+            """)
+            if result:
+                stats.update(dict(result))
                 stats['db_size_mb'] = stats['db_size_bytes'] / (1024 * 1024)
             
             return stats
@@ -396,12 +854,32 @@ class Database:
             return {}
     
     def close(self):
-        """Close database connection."""
-        if self.connection:
-            self.connection.close()
-            self.connection = None
-            logger.debug("Database connection closed")
-    
-    def __del__(self):
-        """Cleanup on deletion."""
+        """
+        Close database connections.
+        
+        Refreshes planner statistics and truncates the WAL first, so the
+        next start does not have to replay it.
+        """
+        atexit.unregister(self.close)
+        
+        if self._read_pool is not None:
+            while not self._read_pool.empty():
+                self._read_pool.get_nowait().close()
+            self._read_pool = None
+        
+        with self._lock:
+            if self.connection:
+                try:
+                    self.connection.execute("PRAGMA optimize")
+                    self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                except sqlite3.Error as e:
+                    logger.warning(f"Checkpoint before close failed: {e}")
+                self.connection.close()
+                self.connection = None
+                logger.debug("Database connection closed")
+    
+    def __enter__(self) -> 'Database':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
         self.close()
\ No newline at end of file
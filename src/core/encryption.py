@@ -1,16 +1,74 @@
 """Encryption service using AES-256-GCM and Argon2id."""
+import os
 import secrets
 import logging
-from typing import Optional, Tuple
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.argon2 import Argon2id
 from cryptography.exceptions import InvalidTag
 
 logger = logging.getLogger(__name__)
 
+# AES-GCM in OpenSSL releases the GIL, so large batches are split over threads
+_CRYPTO_WORKERS = os.cpu_count() or 1
+_crypto_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_crypto_executor() -> ThreadPoolExecutor:
+    """Return the shared encryption/decryption thread pool, creating it on first use."""
+    global _crypto_executor
+    if _crypto_executor is None:
+        _crypto_executor = ThreadPoolExecutor(
+            max_workers=_CRYPTO_WORKERS, thread_name_prefix='crypto')
+    return _crypto_executor
+
+
+# Plaintexts at least this long (in bytes) are compressed before encryption
+_COMPRESS_MIN = 256
+
+# Ciphertexts at least this long are sliced through a memoryview on decrypt,
+# so the nonce/ciphertext split shares the buffer instead of copying it
+# (smaller values are cheaper to copy than to wrap)
+_ZERO_COPY_MIN = 4096
+
+# Leads a compressed plaintext; 0xFF never occurs in UTF-8, so plaintexts
+# stored uncompressed (including all older values) are never mistaken for one
+_COMPRESSED = b'\xff'
+
+
+def _pack(plaintext: str) -> bytes:
+    """Encode a plaintext for encryption, deflating it when that saves space."""
+    data = plaintext.encode('utf-8')
+    if len(data) >= _COMPRESS_MIN:
+        packed = _COMPRESSED + zlib.compress(data, 6)
+        if len(packed) < len(data):
+            return packed
+    return data
+
+
+def _unpack(data: bytes) -> str:
+    """Decode a decrypted plaintext written by _pack."""
+    if data.startswith(_COMPRESSED):
+        data = zlib.decompress(data[1:])
+    return data.decode('utf-8')
+
 
 class EncryptionService:
-    """Secure encryption service using AES-256-GCM with Argon2id key derivation."""
+    """
+    Secure encryption service using AES-256-GCM with Argon2id key derivation.
+    
+    Values encrypted with the cached key are stored as nonce + ciphertext,
+    with the vault salt bound as associated data instead of repeated in
+    every value. Values encrypted with an explicit password, and cached-key
+    values written before that change, are stored as salt + nonce +
+    ciphertext.
+    """
     
     KEY_SIZE = 32  # 256 bits for AES-256
     SALT_SIZE = 16  # 128 bits
@@ -22,12 +80,32 @@ class EncryptionService:
     ARGON2_MEMORY_COST = 65536  # 64 MB
     ARGON2_LANES = 4  # parallelism
     
+    # Decrypted values kept in memory, keyed by their ciphertext; bounded both
+    # by count and by total ciphertext bytes, so a few large note bodies
+    # cannot hold on to an unbounded amount of plaintext
+    DECRYPT_CACHE_SIZE = 4096
+    DECRYPT_CACHE_BYTES = 8 * 1024 * 1024
+    
+    # Values (or decrypt cache misses) needed before a batch is spread over threads
+    PARALLEL_BATCH_MIN = 256
+    
     def __init__(self):
         """Initialize encryption service."""
         self._cached_key: Optional[bytes] = None
         self._cached_salt: Optional[bytes] = None
+        self._aesgcm: Optional[AESGCM] = None
+        # Shared by UI and worker threads, so every access holds the lock
+        self._decrypt_cache: OrderedDict = OrderedDict()
+        self._decrypt_cache_bytes = 0
+        self._decrypt_cache_lock = threading.Lock()
+        self._key_generation = 0
         logger.info("EncryptionService initialized")
     
+    @property
+    def key_generation(self) -> int:
+        """Counter bumped whenever the cached key is set or cleared."""
+        return self._key_generation
+    
     def derive_key(self, password: str, salt: Optional[bytes] = None) -> Tuple[bytes, bytes]:
         """Derive encryption key from password using Argon2id."""
         if not password:
@@ -61,14 +139,22 @@ class EncryptionService:
     def cache_key(self, password: str, salt: Optional[bytes] = None) -> bytes:
         """Derive and cache the encryption key."""
         try:
-            self._cached_key, salt_used = self.derive_key(password, salt)
-            self._cached_salt = salt_used
-            logger.info("Encryption key cached")
+            key, salt_used = self.derive_key(password, salt)
+            self.set_cached_key(key, salt_used)
             return salt_used
         except Exception as e:
             logger.error(f"Failed to cache key: {str(e)}")
             raise
     
+    def set_cached_key(self, key: bytes, salt: bytes):
+        """Cache an already derived encryption key and its salt."""
+        self._cached_key = key
+        self._cached_salt = salt
+        self._aesgcm = None
+        self._clear_decrypt_cache()
+        self._key_generation += 1
+        logger.info("Encryption key cached")
+    
     def clear_cached_key(self):
         """Securely clear cached encryption key."""
         try:
@@ -78,10 +164,22 @@ class EncryptionService:
             if self._cached_salt:
                 self._cached_salt = b'\x00' * len(self._cached_salt)
                 self._cached_salt = None
+            self._aesgcm = None
+            self._clear_decrypt_cache()
+            self._key_generation += 1
             logger.info("Cached key cleared")
         except Exception as e:
             logger.error(f"Error clearing key: {str(e)}")
     
+    def derive_subkey(self, purpose: bytes) -> bytes:
+        """Derive a 256-bit key for a separate purpose (e.g. a search index) from the cached key."""
+        if not self._cached_key:
+            raise ValueError("No cached key available")
+        
+        hkdf = HKDF(algorithm=hashes.SHA256(), length=self.KEY_SIZE,
+                    salt=self._cached_salt, info=purpose)
+        return hkdf.derive(self._cached_key)
+    
     def encrypt(self, plaintext: str, password: Optional[str] = None) -> bytes:
         """Encrypt plaintext using AES-256-GCM."""
         if not plaintext:
@@ -89,17 +187,20 @@ class EncryptionService:
         
         if password:
             key, salt = self.derive_key(password)
+            aesgcm = AESGCM(key)
         elif self._cached_key and self._cached_salt:
-            key = self._cached_key
-            salt = self._cached_salt
+            aesgcm = self._get_cipher()
         else:
             raise ValueError("No password or cached key available")
         
         try:
             nonce = secrets.token_bytes(self.NONCE_SIZE)
-            aesgcm = AESGCM(key)
-            ciphertext = aesgcm.encrypt(nonce, plaintext.encode('utf-8'), None)
-            encrypted_data = salt + nonce + ciphertext
+            if password:
+                ciphertext = aesgcm.encrypt(nonce, _pack(plaintext), None)
+                encrypted_data = b''.join((salt, nonce, ciphertext))
+            else:
+                ciphertext = aesgcm.encrypt(nonce, _pack(plaintext), self._cached_salt)
+                encrypted_data = nonce + ciphertext
             logger.info(f"Data encrypted ({len(plaintext)} bytes)")
             return encrypted_data
         
@@ -111,31 +212,52 @@ class EncryptionService:
             if password and 'key' in locals():
                 key = b'\x00' * len(key)
     
+    def encrypt_many(self, plaintexts: List[str]) -> List[bytes]:
+        """Encrypt a batch of values with the cached key, reusing one cipher."""
+        if not self._cached_key or not self._cached_salt:
+            raise ValueError("No cached key available")
+        
+        try:
+            if not all(plaintexts):
+                raise ValueError("Plaintext cannot be empty")
+            
+            results = self._map_chunks(self._encrypt_chunk, plaintexts)
+            
+            logger.info(f"Batch encrypted ({len(results)} items)")
+            return results
+        
+        except Exception as e:
+            logger.error(f"Batch encryption failed: {str(e)}")
+            raise ValueError(f"Encryption failed: {str(e)}")
+    
     def decrypt(self, encrypted_data: bytes, password: Optional[str] = None) -> str:
         """Decrypt data encrypted with AES-256-GCM."""
         if not encrypted_data:
             raise ValueError("Encrypted data cannot be empty")
         
-        min_length = self.SALT_SIZE + self.NONCE_SIZE + self.TAG_SIZE
+        min_length = (self.SALT_SIZE if password else 0) + self.NONCE_SIZE + self.TAG_SIZE
         if len(encrypted_data) < min_length:
             raise ValueError(f"Invalid encrypted data: too short")
         
         try:
-            salt = encrypted_data[:self.SALT_SIZE]
-            nonce = encrypted_data[self.SALT_SIZE:self.SALT_SIZE + self.NONCE_SIZE]
-            ciphertext = encrypted_data[self.SALT_SIZE + self.NONCE_SIZE:]
+            if not password:
+                cached = self._cache_lookup(encrypted_data)
+                if cached is not None:
+                    return cached
             
             if password:
+                salt = encrypted_data[:self.SALT_SIZE]
+                nonce = encrypted_data[self.SALT_SIZE:self.SALT_SIZE + self.NONCE_SIZE]
+                ciphertext = encrypted_data[self.SALT_SIZE + self.NONCE_SIZE:]
                 key, _ = self.derive_key(password, salt)
-            elif self._cached_key and self._cached_salt == salt:
-                key = self._cached_key
+                plaintext = _unpack(AESGCM(key).decrypt(nonce, ciphertext, None))
+            elif self._cached_key and self._cached_salt:
+                plaintext = self._decrypt_chunk(self._get_cipher(), [encrypted_data])[0]
+                self._cache_store(encrypted_data, plaintext)
             else:
-                raise ValueError("No password or matching cached key")
-            
-            aesgcm = AESGCM(key)
-            plaintext = aesgcm.decrypt(nonce, ciphertext, None)
+                raise ValueError("No password or cached key available")
             logger.info("Data decrypted")
-            return plaintext.decode('utf-8')
+            return plaintext
         
         except InvalidTag:
             logger.warning("Decryption failed: wrong password")
@@ -148,6 +270,132 @@ class EncryptionService:
             if password and 'key' in locals():
                 key = b'\x00' * len(key)
     
+    def decrypt_many(self, ciphertexts: List[bytes]) -> List[str]:
+        """Decrypt a batch of values with the cached key, reusing one cipher."""
+        if not self._cached_key or not self._cached_salt:
+            raise ValueError("No cached key available")
+        
+        min_length = self.NONCE_SIZE + self.TAG_SIZE
+        
+        try:
+            plaintexts: List[Optional[str]] = []
+            misses = []
+            
+            for index, encrypted_data in enumerate(ciphertexts):
+                plaintext = self._cache_lookup(encrypted_data)
+                if plaintext is None:
+                    if not encrypted_data or len(encrypted_data) < min_length:
+                        raise ValueError("Invalid encrypted data: too short")
+                    misses.append(index)
+                plaintexts.append(plaintext)
+            
+            if misses:
+                pending = [ciphertexts[index] for index in misses]
+                for index, plaintext in zip(misses, self._decrypt_pending(pending)):
+                    plaintexts[index] = plaintext
+                    self._cache_store(ciphertexts[index], plaintext)
+            
+            logger.info(f"Batch decrypted ({len(plaintexts)} items)")
+            return plaintexts
+        
+        except InvalidTag:
+            logger.warning("Batch decryption failed: wrong key")
+            raise ValueError("Decryption failed: incorrect password or corrupted data")
+        except Exception as e:
+            logger.error(f"Batch decryption failed: {str(e)}")
+            raise ValueError(f"Decryption failed: {str(e)}")
+    
+    def _decrypt_pending(self, pending: List[bytes]) -> List[str]:
+        """Decrypt validated ciphertexts, in parallel chunks for large batches."""
+        return self._map_chunks(self._decrypt_chunk, pending)
+    
+    def _map_chunks(self, func, items: list) -> list:
+        """
+        Apply func(cipher, chunk) over items with the cached cipher.
+        
+        Large batches are split into one chunk per worker thread; results
+        keep the order of items.
+        """
+        aesgcm = self._get_cipher()
+        if len(items) < self.PARALLEL_BATCH_MIN or _CRYPTO_WORKERS < 2:
+            return func(aesgcm, items)
+        
+        size = -(-len(items) // _CRYPTO_WORKERS)
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+        results = []
+        for chunk in _get_crypto_executor().map(lambda chunk: func(aesgcm, chunk), chunks):
+            results.extend(chunk)
+        return results
+    
+    def _encrypt_chunk(self, aesgcm: AESGCM, chunk: List[str]) -> List[bytes]:
+        """Encrypt a list of values as nonce + ciphertext with one cipher."""
+        salt = self._cached_salt
+        size = self.NONCE_SIZE
+        # One CSPRNG read for the whole chunk, sliced into per-value nonces
+        nonces = secrets.token_bytes(size * len(chunk))
+        encrypt = aesgcm.encrypt
+        results = []
+        for offset, plaintext in zip(range(0, len(nonces), size), chunk):
+            nonce = nonces[offset:offset + size]
+            results.append(nonce + encrypt(nonce, _pack(plaintext), salt))
+        return results
+    
+    def _decrypt_chunk(self, aesgcm: AESGCM, chunk: List[bytes]) -> List[str]:
+        """Decrypt a list of cached-key values (either layout) with one cipher."""
+        salt = self._cached_salt
+        legacy_header = self.SALT_SIZE + self.NONCE_SIZE
+        results = []
+        for data in chunk:
+            # Written before the salt moved into the associated data
+            legacy = data.startswith(salt)
+            if len(data) >= _ZERO_COPY_MIN:
+                data = memoryview(data)
+            if legacy:
+                plaintext = aesgcm.decrypt(
+                    data[self.SALT_SIZE:legacy_header], data[legacy_header:], None)
+            else:
+                plaintext = aesgcm.decrypt(
+                    data[:self.NONCE_SIZE], data[self.NONCE_SIZE:], salt)
+            results.append(_unpack(plaintext))
+        return results
+    
+    def _get_cipher(self) -> AESGCM:
+        """Return the AES-GCM instance for the cached key, creating it once."""
+        if self._aesgcm is None:
+            self._aesgcm = AESGCM(self._cached_key)
+        return self._aesgcm
+    
+    def _cache_lookup(self, encrypted_data: bytes) -> Optional[str]:
+        """Return a previously decrypted value, marking it recently used."""
+        with self._decrypt_cache_lock:
+            plaintext = self._decrypt_cache.get(encrypted_data)
+            if plaintext is not None:
+                self._decrypt_cache.move_to_end(encrypted_data)
+            return plaintext
+    
+    def _cache_store(self, encrypted_data: bytes, plaintext: str):
+        """Remember a decrypted value, evicting the least recently used."""
+        size = len(encrypted_data)
+        if size > self.DECRYPT_CACHE_BYTES // 16:
+            # Large bodies are cheap to decrypt again relative to their size
+            return
+        
+        cache = self._decrypt_cache
+        with self._decrypt_cache_lock:
+            if encrypted_data not in cache:
+                self._decrypt_cache_bytes += size
+            cache[encrypted_data] = plaintext
+            while (len(cache) > self.DECRYPT_CACHE_SIZE or
+                   self._decrypt_cache_bytes > self.DECRYPT_CACHE_BYTES):
+                evicted, _ = cache.popitem(last=False)
+                self._decrypt_cache_bytes -= len(evicted)
+    
+    def _clear_decrypt_cache(self):
+        """Drop every decrypted value."""
+        with self._decrypt_cache_lock:
+            self._decrypt_cache.clear()
+            self._decrypt_cache_bytes = 0
+    
     def verify_password(self, password: str, salt: bytes) -> bool:
         """Verify if a password matches."""
         try:
@@ -1,20 +1,215 @@
+"""
+Encrypted note store kept in ~/.secure-notes/notes.db.
+
+list_notes() and search_notes() return NoteMeta objects instead of dicts:
+read meta.title, not meta['title']. search_notes() is a generator.
+
+Note IDs are 32-character hex strings (dashed UUIDs are still accepted).
+created_at and updated_at on Note and NoteMeta are integer unix milliseconds,
+not datetimes; created_at_dt and updated_at_dt give local datetimes.
+"""
+import hashlib
 import sqlite3
+import threading
+import time
 import uuid
 from datetime import datetime
 from pathlib import Path
 import os
-from typing import List, Optional, Dict, Any
+import queue
+from typing import List, Optional, Dict, Iterable, Iterator, Tuple
+from contextlib import contextmanager
 from dataclasses import dataclass
 
+# Applied once to the persistent connection
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -20000",
+    "PRAGMA mmap_size = 268435456",
+)
+
+# Read-only pool connections only need the caching pragmas
+_READ_PRAGMAS = (
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -20000",
+    "PRAGMA mmap_size = 268435456",
+)
+
+# Search index: every lower-cased trigram of a note's title and content is
+# stored only as a keyed hash, so the database never holds searchable plaintext.
+# Hashes are truncated; a collision just adds a candidate that the plaintext
+# check after decryption drops.
+_SEARCH_KEY_PURPOSE = b"note-search-index"
+_TOKEN_BYTES = 8
+
+# Rows fetched and decrypted per batch while streaming search results. A page
+# is one decrypt_many() call of two values per row, comfortably above
+# EncryptionService.PARALLEL_BATCH_MIN, so each page is decrypted across the
+# crypto thread pool (AES-GCM releases the GIL)
+_SEARCH_PAGE_SIZE = 256
+
+
+def _blind_tokens(key: bytes, texts: Iterable[str]) -> str:
+    """Space-separated keyed hashes (hex) of the trigrams in the lower-cased texts."""
+    trigrams = set()
+    for text in texts:
+        text = text.lower()
+        trigrams.update(text[i:i + 3] for i in range(len(text) - 2))
+    
+    base = hashlib.blake2b(key=key, digest_size=_TOKEN_BYTES)
+    tokens = []
+    for trigram in trigrams:
+        digest = base.copy()
+        digest.update(trigram.encode('utf-8'))
+        tokens.append(digest.hexdigest())
+    return " ".join(tokens)
+
+
+# Stored in PRAGMA user_version: 1 = note IDs are 16-byte UUID blobs (0 =
+# 36-character text IDs); 2 = timestamps are integer unix milliseconds (before,
+# UTC "YYYY-MM-DD HH:MM:SS" text)
+_SCHEMA_VERSION = 2
+
+
+def _now_ms() -> int:
+    """Current time in unix milliseconds, as stored in created_at/updated_at."""
+    return time.time_ns() // 1_000_000
+
+
+def _stored_id(note_id: str) -> Optional[bytes]:
+    """
+    Stored form of a note ID: the 16 UUID bytes. Accepts the hex IDs the
+    manager returns as well as older dashed ones; None if it is not a UUID.
+    """
+    try:
+        return uuid.UUID(note_id).bytes
+    except ValueError:
+        return None
+
+
+def _public_id(stored_id) -> str:
+    """Note ID as returned to callers: the hex of a stored UUID blob (text IDs as-is)."""
+    return stored_id.hex() if isinstance(stored_id, bytes) else stored_id
+
+
+# Longest title taken from a note's first line
+_TITLE_LENGTH = 50
+
+
+def _derive_title(content: str) -> str:
+    """Title for a note without one: its first line, cut to _TITLE_LENGTH characters."""
+    # Only the leading characters can end up in the title, so never scan past them
+    return content[:_TITLE_LENGTH].partition('\n')[0] or "Untitled Note"
+
+
+# Statements kept as constants so the connection's statement cache reuses
+# their prepared form
+# Takes (id, title_encrypted, content_encrypted, now_ms)
+_INSERT_NOTE_SQL = """
+    INSERT INTO notes (id, title_encrypted, content_encrypted, created_at, updated_at)
+    VALUES (?1, ?2, ?3, ?4, ?4)
+"""
+
+_SELECT_NOTE_SQL = """
+    SELECT id, title_encrypted, content_encrypted, created_at, updated_at, tags_encrypted
+    FROM notes WHERE id = ?
+"""
+
+_UPDATE_NOTE_SQL = """
+    UPDATE notes 
+    SET title_encrypted = ?, content_encrypted = ?, updated_at = ?
+    WHERE id = ?
+"""
+
+# Title-only updates; the content is read to rebuild the search index entry
+_SELECT_CONTENT_SQL = "SELECT content_encrypted FROM notes WHERE id = ?"
+
+_UPDATE_TITLE_SQL = "UPDATE notes SET title_encrypted = ?, updated_at = ? WHERE id = ?"
+
+_DELETE_NOTE_SQL = "DELETE FROM notes WHERE id = ?"
+
+_LIST_NOTES_SQL = """
+    SELECT id, title_encrypted, created_at, updated_at
+    FROM notes 
+    ORDER BY updated_at DESC 
+    LIMIT ?
+"""
+
+_SEARCH_ALL_SQL = """
+    SELECT id, title_encrypted, content_encrypted, created_at, updated_at
+    FROM notes 
+    ORDER BY updated_at DESC
+"""
+
+_SEARCH_INDEX_SQL = """
+    SELECT id, title_encrypted, content_encrypted, created_at, updated_at
+    FROM notes
+    WHERE rowid IN (SELECT rowid FROM notes_fts WHERE notes_fts MATCH ?)
+    ORDER BY updated_at DESC
+"""
+
+# Search index maintenance; takes (rowid, tokens)
+_INDEX_ROW_SQL = "INSERT OR REPLACE INTO notes_fts (rowid, tokens) VALUES (?, ?)"
+
+# Takes (tokens, note id)
+_INDEX_NOTE_SQL = """
+    INSERT OR REPLACE INTO notes_fts (rowid, tokens)
+    SELECT rowid, ? FROM notes WHERE id = ?
+"""
+
+_UNINDEX_NOTE_SQL = """
+    DELETE FROM notes_fts WHERE rowid = (SELECT rowid FROM notes WHERE id = ?)
+"""
+
+_UNINDEXED_NOTES_SQL = """
+    SELECT rowid, title_encrypted, content_encrypted FROM notes
+    WHERE rowid NOT IN (SELECT rowid FROM notes_fts)
+"""
+
+
 @dataclass
 class Note:
     """Data class representing a note."""
     id: str
     title: str
     content: str
-    created_at: datetime
-    updated_at: datetime
+    created_at: int  # unix milliseconds
+    updated_at: int
     tags: List[str] = None
+    
+    @property
+    def created_at_dt(self) -> datetime:
+        """created_at as a local datetime."""
+        return datetime.fromtimestamp(self.created_at / 1000)
+    
+    @property
+    def updated_at_dt(self) -> datetime:
+        """updated_at as a local datetime."""
+        return datetime.fromtimestamp(self.updated_at / 1000)
+
+
+@dataclass
+class NoteMeta:
+    """Note metadata returned by list and search (no content)."""
+    
+    __slots__ = ('id', 'title', 'created_at', 'updated_at')
+    
+    id: str
+    title: str
+    created_at: int  # unix milliseconds
+    updated_at: int
+    
+    @property
+    def created_at_dt(self) -> datetime:
+        """created_at as a local datetime."""
+        return datetime.fromtimestamp(self.created_at / 1000)
+    
+    @property
+    def updated_at_dt(self) -> datetime:
+        """updated_at as a local datetime."""
+        return datetime.fromtimestamp(self.updated_at / 1000)
 
 class NoteManager:
     """
@@ -22,159 +217,440 @@ class NoteManager:
     Security Controls: Information Disclosure, Tampering
     """
     
+    # Read-only connections for get/list/search; in WAL mode they read
+    # committed data without waiting on the writer or on each other
+    READ_POOL_SIZE = 2
+    
+    # Seconds a read waits for a pooled connection before opening its own;
+    # an unfinished search_notes generator keeps its connection borrowed
+    READ_POOL_WAIT = 5.0
+    
     def __init__(self, encryption_service):
         self.encryption_service = encryption_service
         self.db_path = Path(os.path.expanduser("~/.secure-notes")) / "notes.db"
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # One autocommit connection for the manager's lifetime, shared across
+        # threads and serialized by the lock; it makes every change
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                     isolation_level=None, cached_statements=256)
+        for pragma in _CONNECTION_PRAGMAS:
+            self._conn.execute(pragma)
+        
+        # Decrypted titles by stored (16-byte) note ID, each stored with the
+        # ciphertext it came from; an entry is only used while that ciphertext
+        # is still current and the key it was decrypted under is still cached
+        self._title_cache: Dict[bytes, Tuple[bytes, str]] = {}
+        self._title_cache_generation = encryption_service.key_generation
+        
+        # (key generation, search index key); derived once per cached key
+        self._search_key: Optional[Tuple[int, bytes]] = None
+        
         self.init_database()
+        
+        self._read_pool = queue.Queue()
+        for _ in range(self.READ_POOL_SIZE):
+            self._read_pool.put(self._open_read_connection())
+    
+    def _open_read_connection(self) -> sqlite3.Connection:
+        """Open a read-only connection for the read pool."""
+        connection = sqlite3.connect(
+            f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True,
+            check_same_thread=False, cached_statements=256
+        )
+        for pragma in _READ_PRAGMAS:
+            connection.execute(pragma)
+        return connection
+    
+    def _titles(self) -> Dict[bytes, Tuple[bytes, str]]:
+        """Return the title cache, emptied first if the key was cleared or changed."""
+        generation = self.encryption_service.key_generation
+        if generation != self._title_cache_generation:
+            self._title_cache.clear()
+            self._title_cache_generation = generation
+        return self._title_cache
+    
+    @contextmanager
+    def _reader(self):
+        """
+        Lend a pooled read-only connection, waiting up to READ_POOL_WAIT for
+        one if all are in use and then reading on a connection of its own.
+        """
+        try:
+            connection = self._read_pool.get(timeout=self.READ_POOL_WAIT)
+        except queue.Empty:
+            connection = self._open_read_connection()
+            try:
+                yield connection
+            finally:
+                connection.close()
+            return
+        
+        try:
+            yield connection
+        finally:
+            self._read_pool.put(connection)
+    
+    @contextmanager
+    def _transaction(self):
+        """Hold the lock and run the enclosed statements in one transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+    
+    def close(self):
+        """Close the database connection and drop decrypted titles and the search key."""
+        self._title_cache.clear()
+        self._search_key = None
+        while not self._read_pool.empty():
+            self._read_pool.get_nowait().close()
+        with self._lock:
+            self._conn.close()
     
     def init_database(self):
         """Initialize SQLite database with notes table."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
+        with self._lock:
+            self._conn.execute("""
                 CREATE TABLE IF NOT EXISTS notes (
-                    id TEXT PRIMARY KEY,
+                    id BLOB PRIMARY KEY,
                     title_encrypted TEXT NOT NULL,
                     content_encrypted TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    created_at INTEGER NOT NULL,
+                    updated_at INTEGER NOT NULL,
                     tags_encrypted TEXT DEFAULT ''
                 )
             """)
             
             # Create index for faster searches
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_updated_at ON notes(updated_at)")
-            conn.commit()
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_updated_at ON notes(updated_at)")
+            
+            # Blind search index keyed by notes.rowid (see _blind_tokens)
+            self._conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts
+                USING fts5(tokens, tokenize = 'ascii')
+            """)
+            
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < _SCHEMA_VERSION:
+                self._migrate(version)
+    
+    def _migrate(self, version: int):
+        """Bring a database at schema version `version` up to date (caller holds the lock)."""
+        # Existing tables keep their old column declarations: blobs and
+        # integers are stored as-is under TEXT/TIMESTAMP affinity, so no rebuild
+        # is needed, and rowids (and so the search index) are unchanged
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version < 1:
+                # IDs that are not UUIDs could never be looked up; they get new ones
+                rows = self._conn.execute(
+                    "SELECT rowid, id FROM notes WHERE typeof(id) = 'text'").fetchall()
+                self._conn.executemany(
+                    "UPDATE notes SET id = ? WHERE rowid = ?",
+                    [(_stored_id(note_id) or uuid.uuid4().bytes, rowid)
+                     for rowid, note_id in rows])
+            
+            if version < 2:
+                # CURRENT_TIMESTAMP text is UTC, which strftime('%s') also assumes
+                self._conn.execute("""
+                    UPDATE notes SET
+                        created_at = CAST(strftime('%s', created_at) AS INTEGER) * 1000,
+                        updated_at = CAST(strftime('%s', updated_at) AS INTEGER) * 1000
+                    WHERE typeof(created_at) = 'text' OR typeof(updated_at) = 'text'
+                """)
+            
+            self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+    
+    def _search_tokens(self, *texts: str) -> str:
+        """Blind-index tokens for texts under the current search key."""
+        generation = self.encryption_service.key_generation
+        cached = self._search_key
+        if cached is None or cached[0] != generation:
+            cached = (generation, self.encryption_service.derive_subkey(_SEARCH_KEY_PURPOSE))
+            self._search_key = cached
+        return _blind_tokens(cached[1], texts)
     
     def create_note(self, content: str, title: str = None) -> str:
         """Create a new note and return its ID."""
-        note_id = str(uuid.uuid4())
+        note_id = uuid.uuid4().bytes
         
         if not title:
-            # Extract title from first line
-            title = content.split('\n')[0][:50] or "Untitled Note"
+            title = _derive_title(content)
         
         # Encrypt sensitive data
         title_encrypted = self.encryption_service.encrypt(title)
         content_encrypted = self.encryption_service.encrypt(content)
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT INTO notes (id, title_encrypted, content_encrypted)
-                VALUES (?, ?, ?)
-            """, (note_id, title_encrypted, content_encrypted))
-            conn.commit()
+        tokens = self._search_tokens(title, content)
+        
+        with self._transaction() as conn:
+            cursor = conn.execute(_INSERT_NOTE_SQL,
+                                  (note_id, title_encrypted, content_encrypted, _now_ms()))
+            conn.execute(_INDEX_ROW_SQL, (cursor.lastrowid, tokens))
         
-        return note_id
+        self._titles()[note_id] = (title_encrypted, title)
+        return note_id.hex()
+    
+    def create_notes_bulk(self, items: List[Tuple[str, Optional[str]]]) -> List[str]:
+        """
+        Create several notes in one transaction.
+        
+        Args:
+            items: (content, title) pairs; a missing title is taken from the content
+            
+        Returns:
+            IDs of the created notes, in the order of items
+        """
+        note_ids = [uuid.uuid4().bytes for _ in items]
+        titles = [
+            title or _derive_title(content)
+            for content, title in items
+        ]
+        contents = [content for content, _ in items]
+        
+        # Encrypt all titles and contents in one batch
+        encrypted = self.encryption_service.encrypt_many(titles + contents)
+        now = _now_ms()
+        rows = [
+            (note_id, title_encrypted, content_encrypted, now)
+            for note_id, title_encrypted, content_encrypted
+            in zip(note_ids, encrypted[:len(items)], encrypted[len(items):])
+        ]
+        index_rows = [
+            (self._search_tokens(title, content), note_id)
+            for note_id, title, content in zip(note_ids, titles, contents)
+        ]
+        
+        with self._transaction() as conn:
+            conn.executemany(_INSERT_NOTE_SQL, rows)
+            conn.executemany(_INDEX_NOTE_SQL, index_rows)
+        
+        cache = self._titles()
+        for (note_id, title_encrypted, _, _), title in zip(rows, titles):
+            cache[note_id] = (title_encrypted, title)
+        return [note_id.hex() for note_id in note_ids]
     
     def get_note(self, note_id: str) -> Optional[Note]:
         """Retrieve a note by ID."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT id, title_encrypted, content_encrypted, created_at, updated_at, tags_encrypted
-                FROM notes WHERE id = ?
-            """, (note_id,))
-            
-            row = cursor.fetchone()
-            if not row:
-                return None
-            
-            # Decrypt sensitive data
-            title = self.encryption_service.decrypt(row[1])
-            content = self.encryption_service.decrypt(row[2])
-            tags_str = self.encryption_service.decrypt(row[5]) if row[5] else ""
-            tags = tags_str.split(",") if tags_str else []
-            
-            return Note(
-                id=row[0],
-                title=title,
-                content=content,
-                created_at=datetime.fromisoformat(row[3]),
-                updated_at=datetime.fromisoformat(row[4]),
-                tags=tags
-            )
-    
-    def update_note(self, note_id: str, content: str, title: str = None) -> bool:
-        """Update an existing note."""
+        stored_id = _stored_id(note_id)
+        if stored_id is None:
+            return None
+        
+        with self._reader() as conn:
+            row = conn.execute(_SELECT_NOTE_SQL, (stored_id,)).fetchone()
+        
+        if not row:
+            return None
+        
+        # Decrypt sensitive data
+        title = self.encryption_service.decrypt(row[1])
+        content = self.encryption_service.decrypt(row[2])
+        self._titles()[stored_id] = (row[1], title)
+        tags_str = self.encryption_service.decrypt(row[5]) if row[5] else ""
+        tags = tags_str.split(",") if tags_str else []
+        
+        return Note(
+            id=_public_id(row[0]),
+            title=title,
+            content=content,
+            created_at=row[3],
+            updated_at=row[4],
+            tags=tags
+        )
+    
+    def update_note(self, note_id: str, content: Optional[str] = None,
+                    title: Optional[str] = None) -> bool:
+        """
+        Update an existing note.
+        
+        Only what is passed is rewritten: without content just the title
+        changes; content without a title takes its title from the first line.
+        A title equal to the current one keeps its ciphertext instead of being
+        encrypted again, so body-only edits (autosave) encrypt once.
+        """
+        stored_id = _stored_id(note_id)
+        if stored_id is None or (content is None and not title):
+            return False
+        
+        if content is None:
+            return self._update_title(stored_id, title)
+        
         if not title:
-            # Extract title from first line
-            title = content.split('\n')[0][:50] or "Untitled Note"
+            title = _derive_title(content)
         
         # Encrypt sensitive data
-        title_encrypted = self.encryption_service.encrypt(title)
+        cached = self._titles().get(stored_id)
+        if cached is not None and cached[1] == title:
+            title_encrypted = cached[0]
+        else:
+            title_encrypted = self.encryption_service.encrypt(title)
         content_encrypted = self.encryption_service.encrypt(content)
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
-                UPDATE notes 
-                SET title_encrypted = ?, content_encrypted = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (title_encrypted, content_encrypted, note_id))
-            conn.commit()
+        tokens = self._search_tokens(title, content)
+        
+        with self._transaction() as conn:
+            cursor = conn.execute(_UPDATE_NOTE_SQL,
+                                  (title_encrypted, content_encrypted, _now_ms(), stored_id))
+            if cursor.rowcount == 0:
+                return False
+            
+            conn.execute(_INDEX_NOTE_SQL, (tokens, stored_id))
+        
+        self._titles()[stored_id] = (title_encrypted, title)
+        return True
+    
+    def _update_title(self, stored_id: bytes, title: str) -> bool:
+        """Rewrite only a note's title (and its search index entry)."""
+        title_encrypted = self.encryption_service.encrypt(title)
+        
+        with self._transaction() as conn:
+            row = conn.execute(_SELECT_CONTENT_SQL, (stored_id,)).fetchone()
+            if row is None:
+                return False
             
-            return cursor.rowcount > 0
+            content = self.encryption_service.decrypt(row[0])
+            conn.execute(_UPDATE_TITLE_SQL, (title_encrypted, _now_ms(), stored_id))
+            conn.execute(_INDEX_NOTE_SQL, (self._search_tokens(title, content), stored_id))
+        
+        self._titles()[stored_id] = (title_encrypted, title)
+        return True
     
     def delete_note(self, note_id: str) -> bool:
         """Delete a note."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("DELETE FROM notes WHERE id = ?", (note_id,))
-            conn.commit()
-            return cursor.rowcount > 0
+        stored_id = _stored_id(note_id)
+        if stored_id is None:
+            return False
+        
+        with self._transaction() as conn:
+            conn.execute(_UNINDEX_NOTE_SQL, (stored_id,))
+            cursor = conn.execute(_DELETE_NOTE_SQL, (stored_id,))
+        
+        self._titles().pop(stored_id, None)
+        return cursor.rowcount > 0
     
-    def list_notes(self, limit: int = 100) -> List[Dict[str, Any]]:
+    def list_notes(self, limit: int = 100) -> List[NoteMeta]:
         """List all notes (metadata only for performance)."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT id, title_encrypted, created_at, updated_at
-                FROM notes 
-                ORDER BY updated_at DESC 
-                LIMIT ?
-            """, (limit,))
-            
-            notes = []
-            for row in cursor.fetchall():
-                # Decrypt only title for list view
-                title = self.encryption_service.decrypt(row[1])
-                notes.append({
-                    'id': row[0],
-                    'title': title,
-                    'created_at': row[2],
-                    'updated_at': row[3]
-                })
-            
-            return notes
-    
-    def search_notes(self, query: str) -> List[Dict[str, Any]]:
-        """Search notes (decrypts content for searching - performance trade-off for security)."""
-        # Note: This is a security vs performance trade-off
-        # For better security, consider client-side search indexing
-        
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT id, title_encrypted, content_encrypted, created_at, updated_at
-                FROM notes 
-                ORDER BY updated_at DESC
-            """)
-            
-            matching_notes = []
-            query_lower = query.lower()
+        with self._reader() as conn:
+            rows = conn.execute(_LIST_NOTES_SQL, (limit,)).fetchall()
+        
+        # Titles come from the cache; only new or changed ones are decrypted,
+        # in one batch with the cached cipher
+        cache = self._titles()
+        titles = []
+        missing = []
+        for index, row in enumerate(rows):
+            entry = cache.get(row[0])
+            if entry is not None and entry[0] == row[1]:
+                titles.append(entry[1])
+            else:
+                titles.append(None)
+                missing.append(index)
+        
+        if missing:
+            decrypted = self.encryption_service.decrypt_many([rows[i][1] for i in missing])
+            for index, title in zip(missing, decrypted):
+                titles[index] = title
+                cache[rows[index][0]] = (rows[index][1], title)
+        
+        return [
+            NoteMeta(_public_id(row[0]), title, row[2], row[3])
+            for row, title in zip(rows, titles)
+        ]
+    
+    def search_notes(self, query: str) -> Iterator[NoteMeta]:
+        """
+        Search notes by case-insensitive substring.
+        
+        Queries of three or more characters look up candidates in the blind
+        trigram index and decrypt only those; shorter queries decrypt every
+        note. Matches are always confirmed against the decrypted text.
+        
+        Results are yielded as each page of rows is decrypted, so the first
+        matches are available before the whole table has been read. The
+        search holds a pooled connection until it is exhausted or closed;
+        other reads wait at most READ_POOL_WAIT for it.
+        """
+        query_lower = query.lower()
+        
+        # Short queries scan every note and most notes miss; for a single ASCII
+        # character, look for both cases in ASCII notes instead of lower-casing them
+        query_upper = query_lower.upper() if len(query_lower) == 1 and query_lower.isascii() else None
+        
+        if len(query_lower) < 3:
+            sql, params = _SEARCH_ALL_SQL, ()
+        else:
+            self._index_missing_notes()
+            sql, params = _SEARCH_INDEX_SQL, (self._search_tokens(query),)
+        
+        with self._reader() as conn:
+            cursor = conn.execute(sql, params)
             
-            for row in cursor.fetchall():
-                try:
-                    # Decrypt and search
-                    title = self.encryption_service.decrypt(row[1])
-                    content = self.encryption_service.decrypt(row[2])
+            while True:
+                rows = cursor.fetchmany(_SEARCH_PAGE_SIZE)
+                if not rows:
+                    break
+                
+                titles = self._titles()
+                for row, decrypted in zip(rows, self._decrypt_notes(rows)):
+                    if decrypted is None:
+                        # Skip corrupted notes
+                        continue
                     
-                    if (query_lower in title.lower() or 
-                        query_lower in content.lower()):
-                        matching_notes.append({
-                            'id': row[0],
-                            'title': title,
-                            'created_at': row[3],
-                            'updated_at': row[4]
-                        })
+                    title, content = decrypted
+                    titles[row[0]] = (row[1], title)
+                    if query_upper is not None and title.isascii() and content.isascii():
+                        found = (query_lower in title or query_lower in content or
+                                 query_upper in title or query_upper in content)
+                    else:
+                        # Index candidates nearly always match, usually verbatim;
+                        # only build lower-cased copies when the plain text has no hit
+                        found = (query_lower in title or query_lower in content or
+                                 query_lower in title.lower() or 
+                                 query_lower in content.lower())
+                    if found:
+                        yield NoteMeta(_public_id(row[0]), title, row[3], row[4])
+    
+    def _index_missing_notes(self):
+        """Add search index entries for notes written before the index existed."""
+        with self._reader() as conn:
+            rows = conn.execute(_UNINDEXED_NOTES_SQL).fetchall()
+        if not rows:
+            return
+        
+        entries = [
+            (row[0], self._search_tokens(*decrypted))
+            for row, decrypted in zip(rows, self._decrypt_notes(rows))
+            if decrypted is not None
+        ]
+        with self._transaction() as conn:
+            conn.executemany(_INDEX_ROW_SQL, entries)
+    
+    def _decrypt_notes(self, rows) -> List[Optional[tuple]]:
+        """
+        Decrypt (title, content) of rows selected as (id, title_encrypted,
+        content_encrypted, ...) in one batch; None for notes that fail to decrypt.
+        """
+        service = self.encryption_service
+        try:
+            plaintexts = service.decrypt_many(
+                [value for row in rows for value in (row[1], row[2])])
+            return list(zip(plaintexts[::2], plaintexts[1::2]))
+        except ValueError:
+            # A corrupted note fails the whole batch; retry row by row to skip it
+            decrypted = []
+            for row in rows:
+                try:
+                    decrypted.append((service.decrypt(row[1]), service.decrypt(row[2])))
                 except Exception:
-                    # Skip corrupted notes
-                    continue
-            
-            return matching_notes
\ No newline at end of file
+                    decrypted.append(None)
+            return decrypted
\ No newline at end of file
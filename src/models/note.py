@@ -5,10 +5,52 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import List, Optional
 
+# Column order expected by Note.from_row_preview (every column but content)
+PREVIEW_COLUMNS = (
+    'id', 'title', 'notebook_id', 'tags', 'created_at_ms', 'modified_at_ms',
+    'is_favorite', 'is_pinned', 'is_archived', 'is_trashed', 'color',
+    'attachments', 'images', 'links', 'has_tasks', 'completed_tasks', 'total_tasks',
+    'word_count', 'character_count', 'reading_time', 'encrypted', 'encryption_version'
+)
+
+# Column order expected by Note.from_row (the preview columns, then content)
+NOTE_COLUMNS = PREVIEW_COLUMNS + ('content',)
+
+# List fields that preview notes keep as raw CSV until first accessed
+_CSV_FIELDS = ('tags', 'attachments', 'images', 'links')
+
+# Timestamps that preview notes keep as unix milliseconds until first accessed
+_MS_FIELDS = ('created_at', 'modified_at')
+
+# Fields set by Note.update_metadata (and so by every save)
+METADATA_FIELDS = (
+    'word_count', 'character_count', 'reading_time', 'modified_at',
+    'total_tasks', 'completed_tasks', 'has_tasks'
+)
+
+# Task checkboxes; the captured mark tells open ("[ ]") from done ("[x]")
+_TASK_RE = re.compile(r'\[([ xX])\]')
+
+
+def _to_ms(value: datetime) -> int:
+    """Convert a local naive datetime to unix milliseconds."""
+    return int(value.timestamp() * 1000)
+
+
 @dataclass
 class Note:
     """Complete note data model with all fields."""
     
+    __slots__ = (
+        'id', 'title', 'content', 'notebook_id', 'tags', 'created_at', 'modified_at',
+        'is_favorite', 'is_pinned', 'is_archived', 'is_trashed', 'color',
+        'attachments', 'images', 'links', 'has_tasks', 'completed_tasks', 'total_tasks',
+        'word_count', 'character_count', 'reading_time', 'encrypted', 'encryption_version',
+        # Raw values kept by from_row_preview until the field is first read
+        '_tags_csv', '_attachments_csv', '_images_csv', '_links_csv',
+        '_created_at_ms', '_modified_at_ms'
+    )
+    
     id: str
     title: str
     content: str
@@ -71,18 +113,117 @@ class Note:
             encryption_version="1.0"
         )
     
-    def update_metadata(self, content: str):
-        """Update metadata based on content."""
+    @staticmethod
+    def from_row_preview(row, title: str) -> 'Note':
+        """
+        Create a list-view Note from a row selected in PREVIEW_COLUMNS order.
+        
+        Content is left empty, list fields are split and timestamps converted
+        lazily on access.
+        """
+        note = Note.__new__(Note)
+        # One unpack instead of an index lookup per column; sqlite3.Row
+        # subscripting was the bulk of the cost
+        (note.id, _, note.notebook_id, note._tags_csv,
+         note._created_at_ms, note._modified_at_ms,
+         is_favorite, is_pinned, is_archived, is_trashed, note.color,
+         note._attachments_csv, note._images_csv, note._links_csv,
+         has_tasks, note.completed_tasks, note.total_tasks,
+         note.word_count, note.character_count, note.reading_time,
+         encrypted, note.encryption_version) = row
+        note.title = title
+        note.content = ""
+        note.is_favorite = bool(is_favorite)
+        note.is_pinned = bool(is_pinned)
+        note.is_archived = bool(is_archived)
+        note.is_trashed = bool(is_trashed)
+        note.has_tasks = bool(has_tasks)
+        note.encrypted = bool(encrypted)
+        return note
+    
+    @staticmethod
+    def from_row(row, title: str, content: str) -> 'Note':
+        """Create a full Note from a row selected in NOTE_COLUMNS order."""
+        note = Note.from_row_preview(row[:len(PREVIEW_COLUMNS)], title)
+        note.content = content
+        return note
+    
+    def __getattr__(self, name: str):
+        """Materialize fields left unset (in raw form) by from_row_preview."""
+        if name in _CSV_FIELDS:
+            raw = self._raw(name, 'csv')
+            if raw is not None:
+                setattr(self, f'_{name}_csv', None)
+                value = raw.split(',') if raw else []
+                setattr(self, name, value)
+                return value
+        elif name in _MS_FIELDS:
+            raw = self._raw(name, 'ms')
+            if raw is not None:
+                setattr(self, f'_{name}_ms', None)
+                value = datetime.fromtimestamp(raw / 1000)
+                setattr(self, name, value)
+                return value
+        raise AttributeError(f"'Note' object has no attribute '{name}'")
+    
+    def _raw(self, name: str, kind: str):
+        """Return the raw preview value of a field that has not been set yet."""
+        raw = getattr(self, f'_{name}_{kind}', None)
+        if raw is None:
+            return None
+        try:
+            object.__getattribute__(self, name)
+        except AttributeError:
+            return raw
+        return None
+    
+    def _csv(self, name: str) -> str:
+        """Serialized form of a list field, reusing the raw CSV if never split."""
+        raw = self._raw(name, 'csv')
+        return raw if raw is not None else ','.join(getattr(self, name))
+    
+    def _ms(self, name: str) -> int:
+        """Unix-ms form of a timestamp field, reusing the raw value if unconverted."""
+        raw = self._raw(name, 'ms')
+        return raw if raw is not None else _to_ms(getattr(self, name))
+    
+    def as_db_row(self, encrypted_title: bytes, encrypted_content: bytes) -> tuple:
+        """
+        Build the notes-table parameter tuple in NoteController's column order.
+        
+        Args:
+            encrypted_title: Ciphertext for the title column
+            encrypted_content: Ciphertext for the content column
+        """
+        return (
+            self.id, encrypted_title, encrypted_content, self.notebook_id,
+            self._csv('tags'), self.created_at.isoformat(), self.modified_at.isoformat(),
+            int(self.is_favorite), int(self.is_pinned), int(self.is_archived),
+            int(self.is_trashed), self.color,
+            self._csv('attachments'), self._csv('images'), self._csv('links'),
+            int(self.has_tasks), self.completed_tasks, self.total_tasks,
+            self.word_count, self.character_count, self.reading_time,
+            int(self.encrypted), self.encryption_version,
+            self._ms('created_at'), self._ms('modified_at')
+        )
+    
+    def update_metadata(self, content: str, now: Optional[datetime] = None):
+        """
+        Update metadata based on content.
+        
+        Args:
+            content: Note content
+            now: Modification time; batch writes pass one shared value
+        """
         self.word_count = len(content.split())
         self.character_count = len(content)
         self.reading_time = max(1, self.word_count // 200)  # Average reading speed
-        self.modified_at = datetime.now()
+        self.modified_at = now or datetime.now()
         
         # Detect tasks
-        task_pattern = r'\[ \]|\[x\]|\[X\]'
-        tasks = re.findall(task_pattern, content)
-        self.total_tasks = len(tasks)
-        self.completed_tasks = len([t for t in tasks if t.lower() == '[x]'])
+        marks = _TASK_RE.findall(content)
+        self.total_tasks = len(marks)
+        self.completed_tasks = self.total_tasks - marks.count(' ')
         self.has_tasks = self.total_tasks > 0
     
     def to_dict(self) -> dict:
@@ -92,7 +233,7 @@ class Note:
             'title': self.title,
             'content': self.content,
             'notebook_id': self.notebook_id,
-            'tags': ','.join(self.tags),
+            'tags': self._csv('tags'),
             'created_at': self.created_at.isoformat(),
             'modified_at': self.modified_at.isoformat(),
             'is_favorite': int(self.is_favorite),
@@ -100,9 +241,9 @@ class Note:
             'is_archived': int(self.is_archived),
             'is_trashed': int(self.is_trashed),
             'color': self.color,
-            'attachments': ','.join(self.attachments),
-            'images': ','.join(self.images),
-            'links': ','.join(self.links),
+            'attachments': self._csv('attachments'),
+            'images': self._csv('images'),
+            'links': self._csv('links'),
             'has_tasks': int(self.has_tasks),
             'completed_tasks': self.completed_tasks,
             'total_tasks': self.total_tasks,
@@ -4,10 +4,19 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
+# Column order expected by Notebook.from_row
+NOTEBOOK_COLUMNS = (
+    'id', 'name', 'parent_id', 'color', 'icon', 'created_at', 'modified_at',
+    'note_count', 'is_default', 'sort_order'
+)
+
 
 @dataclass
 class Notebook:
     """Notebook for organizing notes hierarchically."""
+    
+    __slots__ = NOTEBOOK_COLUMNS
+    
     id: str
     name: str
     parent_id: Optional[str]
@@ -36,6 +45,21 @@ class Notebook:
             sort_order=0
         )
     
+    def as_insert_row(self) -> tuple:
+        """Parameters for NotebookController's insert, in NOTEBOOK_COLUMNS order."""
+        return (
+            self.id, self.name, self.parent_id, self.color, self.icon,
+            self.created_at.isoformat(), self.modified_at.isoformat(),
+            self.note_count, int(self.is_default), self.sort_order
+        )
+    
+    def as_update_row(self) -> tuple:
+        """Parameters for NotebookController's update (note_count is left out)."""
+        return (
+            self.name, self.parent_id, self.color, self.icon,
+            self.modified_at.isoformat(), int(self.is_default), self.sort_order, self.id
+        )
+    
     def to_dict(self) -> dict:
         """Convert to dictionary for storage."""
         return {
@@ -51,6 +75,22 @@ class Notebook:
             'sort_order': self.sort_order
         }
     
+    @staticmethod
+    def from_row(row) -> 'Notebook':
+        """Create notebook from a row selected in NOTEBOOK_COLUMNS order."""
+        return Notebook(
+            id=row[0],
+            name=row[1],
+            parent_id=row[2],
+            color=row[3],
+            icon=row[4],
+            created_at=datetime.fromisoformat(row[5]),
+            modified_at=datetime.fromisoformat(row[6]),
+            note_count=row[7],
+            is_default=bool(row[8]),
+            sort_order=row[9]
+        )
+    
     @staticmethod
     def from_dict(data: dict) -> 'Notebook':
         """Create notebook from dictionary."""
@@ -64,5 +104,5 @@ class Notebook:
             modified_at=datetime.fromisoformat(data['modified_at']),
             note_count=data.get('note_count', 0),
             is_default=bool(data.get('is_default', 0)),
-            sort_order=data.get('sort_number', 0)
+            sort_order=data.get('sort_order', 0)
         )
\ No newline at end of file
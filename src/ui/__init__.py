@@ -1,5 +1,14 @@
 """User interface components."""
-from .main_window import MainWindow
-from .first_run_wizard import FirstRunWizard
 
-__all__ = ['MainWindow', 'FirstRunWizard']
\ No newline at end of file
+__all__ = ['MainWindow', 'FirstRunWizard']
+
+
+def __getattr__(name):
+    """Import windows on first access so one dialog does not load them all."""
+    if name == 'MainWindow':
+        from .main_window import MainWindow
+        return MainWindow
+    if name == 'FirstRunWizard':
+        from .first_run_wizard import FirstRunWizard
+        return FirstRunWizard
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -24,6 +24,11 @@ class AuthenticationDialog(QDialog):
         self.auth_manager = auth_manager
         self.encryption_key = None
         
+        # Owned by the dialog so it outlives animate_shake(); reused per shake
+        self._shake_animation = QPropertyAnimation(self, b"pos", self)
+        self._shake_animation.setDuration(50)
+        self._shake_animation.setLoopCount(3)
+        
         self._setup_ui()
         self._apply_theme()
         
@@ -201,11 +206,14 @@ class AuthenticationDialog(QDialog):
     
     def animate_shake(self):
         """Shake animation for failed login."""
-        animation = QPropertyAnimation(self, b"pos")
-        animation.setDuration(50)
-        animation.setLoopCount(3)
+        animation = self._shake_animation
+        if animation.state() == QPropertyAnimation.State.Running:
+            # Restart from the resting position, not from mid-shake
+            current_pos = animation.endValue()
+            animation.stop()
+        else:
+            current_pos = self.pos()
         
-        current_pos = self.pos()
         animation.setKeyValueAt(0, current_pos)
         animation.setKeyValueAt(0.25, current_pos + QPoint(10, 0))
         animation.setKeyValueAt(0.75, current_pos - QPoint(10, 0))
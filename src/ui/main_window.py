@@ -1,18 +1,20 @@
 """Professional main window with theme support - COMPLETE VERSION."""
 import logging  # Add this missing import
-from datetime import datetime
+import dataclasses
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                               QSplitter, QStatusBar, QToolBar, QLabel, QMessageBox,
                               QListWidget, QListWidgetItem, QTextEdit, QPushButton,
                               QToolButton, QMenu, QLineEdit, QFileDialog)
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QSize
+from PyQt6.QtCore import Qt, QTimer, QThreadPool, pyqtSignal, QSize
 from PyQt6.QtGui import QAction, QKeySequence, QFont, QIcon, QTextCharFormat, QTextCursor
 
 from src.core.config import AppConfig
 from src.core.encryption import EncryptionService
 from src.controllers.note_controller import NoteController
 from src.controllers.notebook_controller import NotebookController
+from src.models.note import METADATA_FIELDS
 from src.ui.theme_manager import ThemeManager, ThemeMode
+from src.ui.worker import Worker
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +38,10 @@ class MainWindow(QMainWindow):
         self.current_note = None
         self.is_modified = False
         
+        # Autosaves run here, one at a time, so the UI never waits on a commit
+        self._save_pool = QThreadPool(self)
+        self._save_pool.setMaxThreadCount(1)
+        
         # Initialize theme manager
         self.theme_manager = ThemeManager()
         self.theme_manager.theme_changed.connect(self._on_theme_changed)
@@ -48,10 +54,17 @@ class MainWindow(QMainWindow):
         self._setup_shortcuts()
         self._setup_auto_save()
         self._setup_auto_lock()
-        self._load_data()
         
         logger.info("Main window initialized with professional UI")
     
+    def populate_async(self):
+        """Load notebooks and notes in the background; the lists fill in when done."""
+        self.statusbar.showMessage("Loading notes...")
+        self._load_worker = Worker(self._fetch_initial_data)
+        self._load_worker.signals.result.connect(self._on_initial_data)
+        self._load_worker.signals.error.connect(self._on_initial_data_error)
+        QThreadPool.globalInstance().start(self._load_worker)
+    
     def _setup_ui(self):
         """Setup the professional 3-panel layout."""
         self.setWindowTitle("TMapp - Secure Note-Taking")
@@ -411,21 +424,29 @@ class MainWindow(QMainWindow):
         self._apply_theme()
         logger.info(f"Theme changed to: {theme_mode}")
     
-    def _load_data(self):
-        """Load initial data."""
-        try:
-            # Load notebooks
-            notebooks = self.notebook_controller.get_all_notebooks()
-            for notebook in notebooks:
-                btn = self._create_sidebar_button(notebook.name, "folder")
-                btn.clicked.connect(lambda checked, nb_id=notebook.id: self._show_notebook_notes(nb_id))
-                self.notebooks_layout.addWidget(btn)
-            
-            # Load all notes
-            self._show_all_notes()
-        except Exception as e:
-            logger.error(f"Failed to load data: {e}")
-            QMessageBox.critical(self, "Error", f"Failed to load data:\n{str(e)}")
+    def _fetch_initial_data(self):
+        """Fetch notebooks and notes (runs on a worker thread)."""
+        notebooks = self.notebook_controller.get_all_notebooks()
+        notes = self.note_controller.get_all_notes()
+        return notebooks, notes
+    
+    def _on_initial_data(self, data):
+        """Fill the sidebar and notes list with the fetched data."""
+        notebooks, notes = data
+        
+        for notebook in notebooks:
+            btn = self._create_sidebar_button(notebook.name, "folder")
+            btn.clicked.connect(lambda checked, nb_id=notebook.id: self._show_notebook_notes(nb_id))
+            self.notebooks_layout.addWidget(btn)
+        
+        self.notes_title.setText("All Notes")
+        self._populate_notes_list(notes)
+        self.statusbar.showMessage("Ready")
+    
+    def _on_initial_data_error(self, message: str):
+        """Report a failed initial load."""
+        logger.error(f"Failed to load data: {message}")
+        QMessageBox.critical(self, "Error", f"Failed to load data:\n{message}")
     
     # ===== NOTE DISPLAY METHODS =====
     
@@ -438,8 +459,8 @@ class MainWindow(QMainWindow):
     def _show_recent(self):
         """Show recent notes."""
         self.notes_title.setText("Recent")
-        notes = self.note_controller.get_all_notes()
-        self._populate_notes_list(notes[:20])
+        notes = self.note_controller.get_recent_notes(20)
+        self._populate_notes_list(notes)
     
     def _show_favorites(self):
         """Show favorite notes."""
@@ -554,41 +575,79 @@ class MainWindow(QMainWindow):
         self.word_count_label.setText(f"{words} words")
     
     def _auto_save(self):
-        """Auto-save current note."""
-        if self.is_modified and self.current_note:
-            self._save_current_note()
-    
-    def _save_current_note(self):
-        """Save current note."""
+        """Auto-save current note in the background."""
+        if (self.is_modified and self.current_note
+                and self._save_pool.activeThreadCount() == 0):
+            self._save_current_note(background=True)
+    
+    def _save_current_note(self, background: bool = False):
+        """
+        Save current note.
+        
+        Args:
+            background: Write on the save thread instead of waiting for the
+                commit; explicit saves (switching notes, locking, closing) wait
+        """
         try:
             if not self.current_note:
                 return
             
+            # Never let two saves of the same note overlap
+            self._save_pool.waitForDone()
+            
             self.current_note.title = self.editor_title.text() or "Untitled"
+            self.current_note.content = self.editor_content.toPlainText()
             
-            content = self.editor_content.toPlainText()
-            self.current_note.set_content(content)
+            # The controller updates the metadata of the note it saves; it gets
+            # a copy, so the save thread never writes to the note the UI reads
+            note = dataclasses.replace(self.current_note)
             
-            self.current_note.updated_at = datetime.now()
+            # Edits made while the save runs set this again
+            self.is_modified = False
             
-            if self.note_controller.update_note(self.current_note):
-                self.is_modified = False
-                self.autosave_label.setText("All changes saved")
-                
-                for i in range(self.notes_list.count()):
-                    item = self.notes_list.item(i)
-                    if item.data(Qt.ItemDataRole.UserRole) == self.current_note.id:
-                        item.setText(self.current_note.title)
-                        break
-                
-                logger.info(f"Saved note: {self.current_note.id}")
+            if background:
+                self._save_worker = Worker(self.note_controller.update_note, note)
+                self._save_worker.signals.result.connect(
+                    lambda saved: self._on_note_saved(note, saved))
+                self._save_worker.signals.error.connect(
+                    lambda message: self._on_note_saved(note, False))
+                self._save_pool.start(self._save_worker)
             else:
-                self.autosave_label.setText("Save failed!")
+                self._on_note_saved(note, self.note_controller.update_note(note))
         
         except Exception as e:
             logger.error(f"Failed to save note: {e}", exc_info=True)
             self.autosave_label.setText(f"Save error!")
     
+    def _on_note_saved(self, note, saved: bool):
+        """
+        Report the outcome of a save and refresh the note's list entry.
+        
+        Args:
+            note: The copy that was saved; its metadata is applied to the
+                current note if that is still the same note
+        """
+        is_current = self.current_note is not None and self.current_note.id == note.id
+        if not saved:
+            if is_current:
+                self.is_modified = True
+            self.autosave_label.setText("Save failed!")
+            return
+        
+        if is_current:
+            for name in METADATA_FIELDS:
+                setattr(self.current_note, name, getattr(note, name))
+        
+        self.autosave_label.setText("All changes saved")
+        
+        for i in range(self.notes_list.count()):
+            item = self.notes_list.item(i)
+            if item.data(Qt.ItemDataRole.UserRole) == note.id:
+                item.setText(note.title)
+                break
+        
+        logger.info(f"Saved note: {note.id}")
+    
     def _on_search(self, query: str):
         """Handle search."""
         if not query:
@@ -648,9 +707,12 @@ class MainWindow(QMainWindow):
         if not self.is_locked:
             if self.is_modified and self.current_note:
                 self._save_current_note()
+            # An autosave may still be encrypting with the key
+            self._save_pool.waitForDone()
             
             self.is_locked = True
             self.encryption_service.clear_cached_key()
+            self.note_controller.clear_search_index()
             self.lock_action.setText("Unlock")
             self.statusbar.showMessage("Application locked")
             self.locked.emit()
@@ -674,6 +736,7 @@ class MainWindow(QMainWindow):
         """Handle window close event."""
         if self.is_modified and self.current_note:
             self._save_current_note()
+        self._save_pool.waitForDone()
         
         splitter_sizes = self.main_splitter.sizes()
         if len(splitter_sizes) >= 2:
@@ -682,6 +745,7 @@ class MainWindow(QMainWindow):
         self.config.save()
         
         self.encryption_service.clear_cached_key()
+        self.note_controller.clear_search_index()
         
         logger.info("Application closing")
         event.accept()
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""Background worker for running blocking calls off the UI thread."""
+import logging
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerSignals(QObject):
+    """Signals emitted by a Worker, delivered on the receiver's thread."""
+
+    result = pyqtSignal(object)
+    error = pyqtSignal(str)
+
+
+class Worker(QRunnable):
+    """Run a callable on a QThreadPool and emit its result."""
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+
+    def run(self):
+        """Execute the callable (called by the thread pool)."""
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            logger.error(f"Background task failed: {e}", exc_info=True)
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.result.emit(result)
@@ -0,0 +1,23 @@
+"""JSON helpers that use orjson when it is installed."""
+import json
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; stdlib json is the fallback
+    orjson = None
+
+
+def loads(data: bytes):
+    """Parse a JSON document from bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, indent: bool = False) -> bytes:
+    """Serialize an object to compact JSON bytes, optionally with two-space indentation."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, indent=2).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
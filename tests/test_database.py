@@ -0,0 +1,309 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+from src.core.database import Database, SCHEMA_VERSION
+from src.core.encryption import EncryptionService
+from src.controllers.note_controller import NoteController
+from src.controllers.notebook_controller import NotebookController
+
+# Schema written before the series of storage changes (user_version 0)
+BASELINE_SCHEMA = """
+    CREATE TABLE notes (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        content TEXT NOT NULL,
+        notebook_id TEXT,
+        tags TEXT DEFAULT '',
+        created_at TEXT NOT NULL,
+        modified_at TEXT NOT NULL,
+        is_favorite INTEGER DEFAULT 0,
+        is_pinned INTEGER DEFAULT 0,
+        is_archived INTEGER DEFAULT 0,
+        is_trashed INTEGER DEFAULT 0,
+        color TEXT,
+        attachments TEXT DEFAULT '',
+        images TEXT DEFAULT '',
+        links TEXT DEFAULT '',
+        has_tasks INTEGER DEFAULT 0,
+        completed_tasks INTEGER DEFAULT 0,
+        total_tasks INTEGER DEFAULT 0,
+        word_count INTEGER DEFAULT 0,
+        character_count INTEGER DEFAULT 0,
+        reading_time INTEGER DEFAULT 0,
+        encrypted INTEGER DEFAULT 1,
+        encryption_version TEXT DEFAULT '1.0',
+        FOREIGN KEY (notebook_id) REFERENCES notebooks(id)
+    );
+    CREATE TABLE notebooks (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        parent_id TEXT,
+        color TEXT,
+        icon TEXT DEFAULT '📓',
+        created_at TEXT NOT NULL,
+        modified_at TEXT NOT NULL,
+        note_count INTEGER DEFAULT 0,
+        is_default INTEGER DEFAULT 0,
+        sort_order INTEGER DEFAULT 0,
+        FOREIGN KEY (parent_id) REFERENCES notebooks(id)
+    );
+    CREATE TABLE tags (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        color TEXT,
+        created_at TEXT NOT NULL,
+        note_count INTEGER DEFAULT 0
+    );
+    CREATE TABLE attachments (
+        id TEXT PRIMARY KEY,
+        note_id TEXT NOT NULL,
+        filename TEXT NOT NULL,
+        file_path TEXT NOT NULL,
+        file_size INTEGER NOT NULL,
+        mime_type TEXT,
+        created_at TEXT NOT NULL,
+        FOREIGN KEY (note_id) REFERENCES notes(id) ON DELETE CASCADE
+    );
+    CREATE INDEX idx_notes_notebook ON notes(notebook_id);
+    CREATE INDEX idx_notes_modified ON notes(modified_at);
+    CREATE INDEX idx_notes_favorite ON notes(is_favorite);
+    CREATE INDEX idx_notes_trashed ON notes(is_trashed);
+"""
+
+
+def make_baseline_db(path: Path, encryption: EncryptionService):
+    """Write a baseline-schema database (4 KB pages) with one active and one trashed note."""
+    conn = sqlite3.connect(str(path))
+    conn.execute("PRAGMA page_size = 4096")
+    conn.executescript(BASELINE_SCHEMA)
+    conn.execute("""
+        INSERT INTO notebooks (id, name, created_at, modified_at, note_count, is_default)
+        VALUES ('nb', 'My Notes', '2024-01-01T10:00:00', '2024-01-01T10:00:00', 0, 1)
+    """)
+    for note_id, title, trashed in (('n1', 'Active note', 0), ('n2', 'Old note', 1)):
+        conn.execute("""
+            INSERT INTO notes (id, title, content, notebook_id, created_at, modified_at,
+                               is_favorite, is_trashed)
+            VALUES (?, ?, ?, 'nb', '2024-01-02T10:00:00', '2024-01-03T10:00:00', 1, ?)
+        """, (note_id, encryption.encrypt(title), encryption.encrypt(f"{title} body"), trashed))
+    conn.commit()
+    conn.close()
+
+
+class TestDatabaseRestore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.encryption = EncryptionService()
+        self.encryption.set_cached_key(os.urandom(32), os.urandom(16))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_restore_baseline_backup(self):
+        backup = self.dir / "baseline.db"
+        make_baseline_db(backup, self.encryption)
+
+        with Database(self.dir / "notes.db") as db:
+            self.assertTrue(db.restore(backup))
+
+            # Rebuilt at the live page size and migrated to the current schema
+            self.assertEqual(db.query_scalar("PRAGMA page_size"), 8192)
+            self.assertEqual(db.query_scalar("PRAGMA user_version"), SCHEMA_VERSION)
+            self.assertEqual(db.query_scalar("PRAGMA journal_mode"), "wal")
+            self.assertEqual(
+                db.query_scalar("SELECT note_count FROM notebooks WHERE id = 'nb'"), 1)
+
+            notes = NoteController(db, self.encryption).get_all_notes()
+            self.assertEqual([note.title for note in notes], ["Active note"])
+            self.assertEqual(notes[0].modified_at.isoformat(), "2024-01-03T10:00:00")
+
+    def test_backup_round_trip(self):
+        with Database(self.dir / "notes.db") as db:
+            controller = NoteController(db, self.encryption)
+            note = controller.create_note("Kept", content="kept body")
+            backup = self.dir / "backup.db"
+            self.assertTrue(db.backup(backup))
+
+            controller.delete_note(note.id, permanent=True)
+            self.assertIsNone(controller.get_note(note.id))
+
+            self.assertTrue(db.restore(backup))
+            self.assertEqual(controller.get_note(note.id).content, "kept body")
+
+    def test_open_existing_4k_database(self):
+        path = self.dir / "notes.db"
+        make_baseline_db(path, self.encryption)
+
+        with Database(path) as db:
+            # page_size only applies to new files; the old file is migrated in place
+            self.assertEqual(db.query_scalar("PRAGMA page_size"), 4096)
+            self.assertEqual(db.query_scalar("PRAGMA user_version"), SCHEMA_VERSION)
+            self.assertEqual(len(NoteController(db, self.encryption).get_all_notes()), 1)
+
+    def test_restore_missing_backup(self):
+        with Database(self.dir / "notes.db") as db:
+            self.assertFalse(db.restore(self.dir / "missing.db"))
+
+
+class TestSchemaMigration(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "notes.db"
+        self.encryption = EncryptionService()
+        self.encryption.set_cached_key(os.urandom(32), os.urandom(16))
+        make_baseline_db(self.path, self.encryption)
+        self.db = Database(self.path)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_version_stamped(self):
+        self.assertEqual(self.db.query_scalar("PRAGMA user_version"), SCHEMA_VERSION)
+
+    def test_timestamp_columns_backfilled(self):
+        rows = self.db.query_all(
+            "SELECT created_at_ms, modified_at_ms FROM notes ORDER BY id")
+        expected = (int(datetime(2024, 1, 2, 10).timestamp() * 1000),
+                    int(datetime(2024, 1, 3, 10).timestamp() * 1000))
+        self.assertEqual([tuple(row) for row in rows], [expected, expected])
+
+    def test_triggers_and_counts(self):
+        triggers = {row[0] for row in self.db.query_all(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        self.assertLessEqual({'notes_count_insert', 'notes_count_delete',
+                              'notes_count_update', 'notebooks_delete_trash_notes'},
+                             triggers)
+        # Counters are recomputed, ignoring the trashed note
+        self.assertEqual(
+            self.db.query_scalar("SELECT note_count FROM notebooks WHERE id = 'nb'"), 1)
+
+    def test_reopen_is_noop(self):
+        self.db.close()
+        self.db = Database(self.path)
+        self.assertEqual(self.db.query_scalar("SELECT COUNT(*) FROM notes"), 2)
+
+
+class TestNoteCountTriggers(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(Path(self.tmp.name) / "notes.db")
+        encryption = EncryptionService()
+        encryption.set_cached_key(os.urandom(32), os.urandom(16))
+        self.notes = NoteController(self.db, encryption)
+        self.notebooks = NotebookController(self.db)
+        self.first = self.notebooks.create_notebook(name="First")
+        self.second = self.notebooks.create_notebook(name="Second")
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def count(self, notebook) -> int:
+        return self.db.query_scalar(
+            "SELECT note_count FROM notebooks WHERE id = ?", (notebook.id,))
+
+    def test_insert_and_delete(self):
+        note = self.notes.create_note("One", self.first.id)
+        self.notes.create_note("Two", self.first.id)
+        self.assertEqual(self.count(self.first), 2)
+
+        self.notes.delete_note(note.id, permanent=True)
+        self.assertEqual(self.count(self.first), 1)
+
+    def test_trash_and_restore(self):
+        note = self.notes.create_note("One", self.first.id)
+        self.notes.delete_note(note.id)
+        self.assertEqual(self.count(self.first), 0)
+
+        # Deleting a trashed note does not count it twice
+        self.notes.restore_note(note.id)
+        self.assertEqual(self.count(self.first), 1)
+        self.notes.delete_note(note.id)
+        self.notes.delete_note(note.id, permanent=True)
+        self.assertEqual(self.count(self.first), 0)
+
+    def test_move(self):
+        note = self.notes.create_note("One", self.first.id)
+        note.notebook_id = self.second.id
+        self.notes.update_note(note)
+        self.assertEqual((self.count(self.first), self.count(self.second)), (0, 1))
+
+    def test_delete_notebook_moves_notes(self):
+        self.notes.create_note("One", self.first.id)
+        self.assertTrue(self.notebooks.delete_notebook(self.first.id, self.second.id))
+        self.assertEqual(self.count(self.second), 1)
+
+
+class TestDatabaseReads(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(Path(self.tmp.name) / "notes.db")
+        self.db.BUSY_TIMEOUT = 0.2
+        with self.db.transaction():
+            for i in range(10):
+                self.db.execute("INSERT INTO tags (id, name, created_at) VALUES (?, ?, '')",
+                                (f"t{i}", f"tag {i}"))
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_abandoned_iterators_do_not_block_reads(self):
+        # Hold every pooled connection with half-consumed iterators
+        iterators = [self.db.iter_query("SELECT * FROM tags", arraysize=1)
+                     for _ in range(self.db.READ_POOL_SIZE)]
+        for iterator in iterators:
+            next(iterator)
+
+        self.assertEqual(self.db.query_scalar("SELECT COUNT(*) FROM tags"), 10)
+
+        for iterator in iterators:
+            iterator.close()
+        self.assertEqual(self.db._read_pool.qsize(), self.db.READ_POOL_SIZE)
+
+    def test_writer_iterator_releases_lock(self):
+        rows = self.db.iter_query("SELECT * FROM tags", writer=True)
+        next(rows)
+
+        # Another thread can write while the iterator is suspended
+        writer = threading.Thread(target=self.db.execute,
+                                  args=("DELETE FROM tags WHERE id = 't0'",))
+        writer.start()
+        writer.join(timeout=2)
+        self.assertFalse(writer.is_alive())
+        self.assertEqual(len(list(rows)), 9)
+
+    def test_error_mid_stream_is_raised(self):
+        rows = self.db.iter_query(
+            "SELECT CASE WHEN id = 't5' THEN json('not json') ELSE id END FROM tags ORDER BY id",
+            arraysize=1)
+        self.assertEqual(next(rows)[0], 't0')
+        with self.assertRaises(sqlite3.Error):
+            list(rows)
+
+    def test_error_on_start_yields_nothing(self):
+        self.assertEqual(list(self.db.iter_query("SELECT * FROM missing_table")), [])
+        self.assertEqual(self.db._read_pool.qsize(), self.db.READ_POOL_SIZE)
+
+    def test_reads_after_close(self):
+        self.db.close()
+        self.assertEqual(self.db.query_all("SELECT * FROM tags"), [])
+        self.assertEqual(list(self.db.iter_query("SELECT * FROM tags")), [])
+        with self.assertRaises(sqlite3.ProgrammingError):
+            with self.db._reader():
+                pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,6 @@
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            import unittest
+import os
+import unittest
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from src.core.encryption import EncryptionService
 
 class TestEncryptionService(unittest.TestCase):
@@ -9,9 +11,10 @@ class TestEncryptionService(unittest.TestCase):
         self.test_data = "This is a test note."
 
     def test_key_derivation(self):
-        key = self.encryption_service.derive_key(self.test_password)
+        key, salt = self.encryption_service.derive_key(self.test_password)
         self.assertIsNotNone(key)
         self.assertEqual(len(key), 32)  # Assuming AES-256 key size
+        self.assertEqual(len(salt), EncryptionService.SALT_SIZE)
 
     def test_encryption_decryption(self):
         encrypted_data = self.encryption_service.encrypt(self.test_data, self.test_password)
@@ -21,12 +24,65 @@ class TestEncryptionService(unittest.TestCase):
     def test_encryption_with_different_passwords(self):
         encrypted_data = self.encryption_service.encrypt(self.test_data, self.test_password)
         different_password = "differentpassword"
-        decrypted_data = self.encryption_service.decrypt(encrypted_data, different_password)
-        self.assertNotEqual(decrypted_data, self.test_data)
+        with self.assertRaises(ValueError):
+            self.encryption_service.decrypt(encrypted_data, different_password)
 
     def test_invalid_decryption(self):
         with self.assertRaises(ValueError):
             self.encryption_service.decrypt(b"invaliddata", self.test_password)
 
+
+class TestCachedKeyFormats(unittest.TestCase):
+
+    def setUp(self):
+        self.key = os.urandom(32)
+        self.salt = os.urandom(16)
+        self.encryption_service = EncryptionService()
+        self.encryption_service.set_cached_key(self.key, self.salt)
+
+    def test_compact_round_trip(self):
+        encrypted_data = self.encryption_service.encrypt("short note")
+        # nonce + ciphertext + tag, without the salt
+        self.assertEqual(len(encrypted_data), 12 + len("short note") + 16)
+        self.assertEqual(self.encryption_service.decrypt(encrypted_data), "short note")
+
+    def test_compressed_round_trip(self):
+        text = "A line that repeats. " * 200
+        encrypted_data = self.encryption_service.encrypt(text)
+        self.assertLess(len(encrypted_data), len(text))
+        self.assertEqual(self.encryption_service.decrypt(encrypted_data), text)
+        self.assertEqual(self.encryption_service.decrypt_many([encrypted_data]), [text])
+
+    def test_short_values_not_compressed(self):
+        text = "x" * 255
+        encrypted_data = self.encryption_service.encrypt(text)
+        self.assertEqual(len(encrypted_data), 12 + len(text) + 16)
+        self.assertEqual(self.encryption_service.decrypt(encrypted_data), text)
+
+    def test_legacy_round_trip(self):
+        # salt + nonce + ciphertext, no associated data, never compressed
+        nonce = os.urandom(12)
+        legacy = self.salt + nonce + AESGCM(self.key).encrypt(nonce, "old note".encode(), None)
+        self.assertEqual(self.encryption_service.decrypt(legacy), "old note")
+
+        large = "é" * 5000
+        legacy_large = self.salt + nonce + AESGCM(self.key).encrypt(nonce, large.encode(), None)
+        self.assertEqual(self.encryption_service.decrypt_many([legacy, legacy_large]),
+                         ["old note", large])
+
+    def test_batch_round_trip(self):
+        texts = [f"note {i} " * (i % 50 + 1) for i in range(600)]
+        encrypted = self.encryption_service.encrypt_many(texts)
+        other = EncryptionService()
+        other.set_cached_key(self.key, self.salt)
+        self.assertEqual(other.decrypt_many(encrypted), texts)
+
+    def test_wrong_salt_rejected(self):
+        encrypted_data = self.encryption_service.encrypt("bound to the salt")
+        other = EncryptionService()
+        other.set_cached_key(self.key, os.urandom(16))
+        with self.assertRaises(ValueError):
+            other.decrypt(encrypted_data)
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
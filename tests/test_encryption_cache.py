@@ -0,0 +1,67 @@
+import os
+import threading
+import unittest
+
+from src.core.encryption import EncryptionService
+
+
+class TestDecryptCache(unittest.TestCase):
+
+    def setUp(self):
+        self.service = EncryptionService()
+        self.service.set_cached_key(os.urandom(32), os.urandom(16))
+
+    def test_hit_returns_plaintext(self):
+        data = self.service.encrypt("title")
+        self.assertEqual(self.service.decrypt(data), "title")
+        self.assertIn(data, self.service._decrypt_cache)
+        self.assertEqual(self.service.decrypt(data), "title")
+
+    def test_bounded_by_bytes(self):
+        service = self.service
+        service.DECRYPT_CACHE_BYTES = 64 * 1024
+        values = service.encrypt_many([os.urandom(1500).hex() for _ in range(100)])
+        service.decrypt_many(values)
+
+        total = sum(len(key) for key in service._decrypt_cache)
+        self.assertLessEqual(total, service.DECRYPT_CACHE_BYTES)
+        self.assertEqual(total, service._decrypt_cache_bytes)
+        self.assertLess(len(service._decrypt_cache), len(values))
+
+    def test_large_values_not_cached(self):
+        self.service.DECRYPT_CACHE_BYTES = 16 * 1024
+        data = self.service.encrypt(os.urandom(2048).hex())
+        self.service.decrypt(data)
+        self.assertNotIn(data, self.service._decrypt_cache)
+
+    def test_unhashable_input_raises_value_error(self):
+        data = self.service.encrypt("title")
+        with self.assertRaises(ValueError):
+            self.service.decrypt(bytearray(data))
+
+    def test_concurrent_use(self):
+        service = self.service
+        service.DECRYPT_CACHE_SIZE = 32
+        values = service.encrypt_many([f"note {i}" for i in range(200)])
+        errors = []
+
+        def worker(offset):
+            try:
+                for _ in range(20):
+                    for index in range(offset, len(values), 3):
+                        self.assertEqual(service.decrypt(values[index]), f"note {index}")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(i % 3,)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(service._decrypt_cache), service.DECRYPT_CACHE_SIZE)
+
+
+if __name__ == '__main__':
+    unittest.main()
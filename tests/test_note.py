@@ -0,0 +1,90 @@
+import unittest
+from datetime import datetime
+
+from src.models.note import Note, PREVIEW_COLUMNS, NOTE_COLUMNS
+
+CREATED_MS = 1704164645000
+MODIFIED_MS = 1704164705500
+
+
+def preview_row(**overrides):
+    """A row in PREVIEW_COLUMNS order."""
+    values = {
+        'id': 'note-1', 'title': b'ciphertext', 'notebook_id': 'nb',
+        'tags': 'work,ideas', 'created_at_ms': CREATED_MS, 'modified_at_ms': MODIFIED_MS,
+        'is_favorite': 1, 'is_pinned': 0, 'is_archived': 0, 'is_trashed': 0,
+        'color': None, 'attachments': '', 'images': 'a.png', 'links': '',
+        'has_tasks': 1, 'completed_tasks': 1, 'total_tasks': 2,
+        'word_count': 3, 'character_count': 12, 'reading_time': 1,
+        'encrypted': 1, 'encryption_version': '1.0',
+    }
+    values.update(overrides)
+    return tuple(values[column] for column in PREVIEW_COLUMNS)
+
+
+class TestFromRowPreview(unittest.TestCase):
+
+    def test_scalar_fields(self):
+        note = Note.from_row_preview(preview_row(), "Title")
+        self.assertEqual((note.id, note.title, note.content), ('note-1', "Title", ""))
+        self.assertIs(note.is_favorite, True)
+        self.assertIs(note.is_trashed, False)
+        self.assertIs(note.has_tasks, True)
+        self.assertEqual((note.completed_tasks, note.total_tasks), (1, 2))
+
+    def test_list_fields_split_on_access(self):
+        note = Note.from_row_preview(preview_row(), "Title")
+        self.assertEqual(note._tags_csv, 'work,ideas')
+
+        self.assertEqual(note.tags, ['work', 'ideas'])
+        self.assertEqual(note.attachments, [])
+        self.assertEqual(note.images, ['a.png'])
+        # Split once, then kept as a plain attribute
+        self.assertIsNone(note._tags_csv)
+        self.assertIs(note.tags, note.tags)
+
+    def test_timestamps_converted_on_access(self):
+        note = Note.from_row_preview(preview_row(), "Title")
+        self.assertEqual(note._created_at_ms, CREATED_MS)
+
+        self.assertEqual(note.created_at, datetime.fromtimestamp(CREATED_MS / 1000))
+        self.assertEqual(note.modified_at, datetime.fromtimestamp(MODIFIED_MS / 1000))
+        self.assertIsNone(note._created_at_ms)
+
+    def test_assigned_fields_win_over_raw(self):
+        note = Note.from_row_preview(preview_row(), "Title")
+        note.tags = ['other']
+        now = datetime(2025, 5, 6, 7, 8, 9)
+        note.modified_at = now
+
+        self.assertEqual(note.tags, ['other'])
+        self.assertEqual(note.modified_at, now)
+        row = note.as_db_row(b't', b'c')
+        self.assertIn('other', row)
+        self.assertIn(now.isoformat(), row)
+
+    def test_db_row_reuses_raw_values(self):
+        note = Note.from_row_preview(preview_row(), "Title")
+        row = note.as_db_row(b't', b'c')
+
+        self.assertIn('work,ideas', row)
+        self.assertIn(CREATED_MS, row)
+        self.assertIn(MODIFIED_MS, row)
+        # Serializing does not materialize the lazy fields
+        self.assertEqual(note._tags_csv, 'work,ideas')
+
+    def test_unknown_attribute(self):
+        note = Note.from_row_preview(preview_row(), "Title")
+        with self.assertRaises(AttributeError):
+            note.missing
+
+    def test_from_row_sets_content(self):
+        row = preview_row() + ('body',)
+        self.assertEqual(len(row), len(NOTE_COLUMNS))
+        note = Note.from_row(row, "Title", "Body text")
+        self.assertEqual(note.content, "Body text")
+        self.assertEqual(note.tags, ['work', 'ideas'])
+
+
+if __name__ == '__main__':
+    unittest.main()
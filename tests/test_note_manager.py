@@ -0,0 +1,246 @@
+import os
+import sqlite3
+import tempfile
+import time
+import types
+import uuid
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from src.core.encryption import EncryptionService
+from src.core.note_manager import NoteManager, NoteMeta
+
+
+class NoteManagerTestCase(unittest.TestCase):
+    """Runs each test against a NoteManager whose ~/.secure-notes lives in a temp dir."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.home = mock.patch.dict(os.environ, {'HOME': self.tmp.name})
+        self.home.start()
+        self.encryption = EncryptionService()
+        self.encryption.set_cached_key(os.urandom(32), os.urandom(16))
+        self.manager = self.open_manager()
+
+    def open_manager(self) -> NoteManager:
+        return NoteManager(self.encryption)
+
+    def tearDown(self):
+        self.manager.close()
+        self.home.stop()
+        self.tmp.cleanup()
+
+
+class TestNoteMeta(NoteManagerTestCase):
+
+    def test_list_shape(self):
+        note_id = self.manager.create_note("Groceries\nmilk", title="Shopping")
+        metas = self.manager.list_notes()
+
+        self.assertEqual(len(metas), 1)
+        meta = metas[0]
+        self.assertIsInstance(meta, NoteMeta)
+        self.assertEqual((meta.id, meta.title), (note_id, "Shopping"))
+        self.assertFalse(hasattr(meta, '__dict__'))
+        self.assertFalse(hasattr(meta, 'content'))
+
+    def test_search_shape(self):
+        note_id = self.manager.create_note("Groceries\nmilk")
+        results = self.manager.search_notes("milk")
+
+        self.assertIsInstance(results, types.GeneratorType)
+        self.assertEqual([(m.id, m.title) for m in results], [(note_id, "Groceries")])
+        self.assertEqual(list(self.manager.search_notes("bread")), [])
+
+
+class TestBlindIndexSearch(NoteManagerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ids = {
+            'zebra': self.manager.create_note("Zoo trip\nSaw a Zebra today"),
+            'shop': self.manager.create_note("Groceries\nmilk, eggs, bread"),
+            'accent': self.manager.create_note("Café notes\ncrème brûlée"),
+        }
+
+    def search(self, query):
+        return sorted(meta.id for meta in self.manager.search_notes(query))
+
+    def test_hits(self):
+        self.assertEqual(self.search("zebra"), [self.ids['zebra']])
+        self.assertEqual(self.search("ZEBRA"), [self.ids['zebra']])
+        self.assertEqual(self.search("groceries"), [self.ids['shop']])
+        self.assertEqual(self.search("CRÈME"), [self.ids['accent']])
+
+    def test_misses(self):
+        self.assertEqual(self.search("giraffe"), [])
+        # Every trigram is indexed, but not as one substring
+        self.assertEqual(self.search("eggs milk"), [])
+
+    def test_short_queries_scan(self):
+        self.assertEqual(self.search("z"), [self.ids['zebra']])
+        self.assertEqual(self.search("gg"), [self.ids['shop']])
+
+    def test_index_follows_changes(self):
+        self.manager.update_note(self.ids['shop'], "Hardware\nnails and glue")
+        self.assertEqual(self.search("milk"), [])
+        self.assertEqual(self.search("nails"), [self.ids['shop']])
+
+        self.manager.delete_note(self.ids['zebra'])
+        self.assertEqual(self.search("zebra"), [])
+
+    def test_index_holds_no_plaintext(self):
+        with sqlite3.connect(self.manager.db_path) as conn:
+            tokens = " ".join(row[0] for row in conn.execute("SELECT tokens FROM notes_fts"))
+        self.assertNotIn("zeb", tokens)
+        self.assertTrue(all(len(token) == 16 for token in tokens.split()))
+
+    def test_search_key_derived_once(self):
+        with mock.patch.object(self.encryption, 'derive_subkey',
+                               wraps=self.encryption.derive_subkey) as derive:
+            self.manager.create_notes_bulk([(f"Note {i}\nbody", None) for i in range(20)])
+            self.search("zebra")
+        derive.assert_not_called()
+
+    def test_search_key_follows_key_change(self):
+        self.encryption.set_cached_key(os.urandom(32), os.urandom(16))
+        new_id = self.manager.create_note("Zebra again\nstripes")
+        # Old entries were hashed under the old key, so only the new note is a candidate
+        self.assertEqual(self.search("zebra"), [new_id])
+
+    def test_unindexed_notes_are_indexed_on_search(self):
+        with self.manager._transaction() as conn:
+            conn.execute("DELETE FROM notes_fts")
+        self.assertEqual(self.search("zebra"), [self.ids['zebra']])
+
+
+class TestTimestamps(NoteManagerTestCase):
+
+    def test_unix_milliseconds(self):
+        before = time.time_ns() // 1_000_000
+        note_id = self.manager.create_note("Dated\nbody")
+        after = time.time_ns() // 1_000_000
+
+        note = self.manager.get_note(note_id)
+        meta = self.manager.list_notes()[0]
+        for value in (note.created_at, note.updated_at, meta.created_at, meta.updated_at):
+            self.assertIsInstance(value, int)
+            self.assertTrue(before <= value <= after)
+
+    def test_datetime_accessors(self):
+        note_id = self.manager.create_note("Dated\nbody")
+        note = self.manager.get_note(note_id)
+        meta = self.manager.list_notes()[0]
+
+        self.assertIsInstance(note.created_at_dt, datetime)
+        self.assertEqual(note.created_at_dt, datetime.fromtimestamp(note.created_at / 1000))
+        self.assertEqual(meta.updated_at_dt, datetime.fromtimestamp(meta.updated_at / 1000))
+
+    def test_update_moves_updated_at(self):
+        note_id = self.manager.create_note("Dated\nbody")
+        created = self.manager.get_note(note_id)
+        time.sleep(0.002)
+        self.manager.update_note(note_id, "Dated\nnew body")
+
+        updated = self.manager.get_note(note_id)
+        self.assertEqual(updated.created_at, created.created_at)
+        self.assertGreater(updated.updated_at, created.updated_at)
+
+
+class TestTitleCache(NoteManagerTestCase):
+
+    def test_cleared_with_key(self):
+        self.manager.create_note("Secret title\nbody")
+        self.assertEqual([n.title for n in self.manager.list_notes()], ["Secret title"])
+
+        self.encryption.clear_cached_key()
+        with self.assertRaises(ValueError):
+            self.manager.list_notes()
+        self.assertEqual(self.manager._title_cache, {})
+
+    def test_cleared_on_key_change(self):
+        self.manager.create_note("Secret title\nbody")
+        self.manager.list_notes()
+
+        # Titles cached under the old key must not be served under a new one
+        self.encryption.set_cached_key(os.urandom(32), os.urandom(16))
+        with self.assertRaises(ValueError):
+            self.manager.list_notes()
+
+
+class TestReadPool(NoteManagerTestCase):
+
+    def test_abandoned_searches_do_not_block_reads(self):
+        self.manager.READ_POOL_WAIT = 0.1
+        for i in range(3):
+            self.manager.create_note(f"Note {i}\nzebra")
+
+        # Hold every pooled connection with unfinished searches
+        searches = [self.manager.search_notes("zebra")
+                    for _ in range(self.manager.READ_POOL_SIZE)]
+        for search in searches:
+            next(search)
+
+        self.assertEqual(len(self.manager.list_notes()), 3)
+        self.assertEqual(len(list(self.manager.search_notes("zebra"))), 3)
+
+        for search in searches:
+            search.close()
+        self.assertEqual(self.manager._read_pool.qsize(), self.manager.READ_POOL_SIZE)
+
+
+class TestMigration(NoteManagerTestCase):
+    """A database written before IDs became blobs and timestamps integers."""
+
+    LEGACY_ID = str(uuid.uuid4())
+
+    def open_manager(self) -> NoteManager:
+        path = os.path.join(self.tmp.name, ".secure-notes")
+        os.makedirs(path)
+        conn = sqlite3.connect(os.path.join(path, "notes.db"))
+        conn.execute("""
+            CREATE TABLE notes (
+                id TEXT PRIMARY KEY,
+                title_encrypted TEXT NOT NULL,
+                content_encrypted TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                tags_encrypted TEXT DEFAULT ''
+            )
+        """)
+        rows = [(self.LEGACY_ID, "Dashed", '2024-01-02 03:04:05'),
+                ("not-a-uuid", "Odd id", '2024-01-01 00:00:00')]
+        for note_id, title, stamp in rows:
+            conn.execute("""
+                INSERT INTO notes (id, title_encrypted, content_encrypted, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (note_id, self.encryption.encrypt(title),
+                  self.encryption.encrypt(f"{title} body"), stamp, stamp))
+        conn.commit()
+        conn.close()
+        return super().open_manager()
+
+    def test_ids_become_blobs(self):
+        with sqlite3.connect(self.manager.db_path) as conn:
+            self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], 2)
+            types = conn.execute("SELECT DISTINCT typeof(id) FROM notes").fetchall()
+        self.assertEqual(types, [('blob',)])
+
+        # Old dashed IDs keep working; unparsable ones were given new IDs
+        self.assertEqual(self.manager.get_note(self.LEGACY_ID).title, "Dashed")
+        metas = {meta.title: meta for meta in self.manager.list_notes()}
+        self.assertEqual(metas["Dashed"].id, uuid.UUID(self.LEGACY_ID).hex)
+        self.assertEqual(self.manager.get_note(metas["Odd id"].id).content, "Odd id body")
+
+    def test_timestamps_become_ms(self):
+        note = self.manager.get_note(self.LEGACY_ID)
+        self.assertEqual(note.created_at, 1704164645000)
+        self.assertEqual(note.updated_at, 1704164645000)
+
+    def test_search_after_migration(self):
+        self.assertEqual([m.title for m in self.manager.search_notes("odd")], ["Odd id"])
+
+
+if __name__ == '__main__':
+    unittest.main()